@@ -1,21 +1,333 @@
 import sys
 import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
 from datetime import datetime
 from docx import Document
 from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QTabWidget, QMessageBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QFormLayout,
+    QTableView, QHeaderView, QDialog, QFormLayout,
     QComboBox, QDateEdit, QAbstractItemView, QMenu
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import (
+    Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal,
+    QAbstractTableModel, QModelIndex
+)
 from PyQt6.QtGui import QAction, QIcon, QFont
 
 # Настройки API
 API_BASE_URL = "http://localhost:5000"
-HEADERS = {}
+API_TIMEOUT = 10
+API_RETRIES = 3           # повторы только для идемпотентных методов (GET, PUT, DELETE, ...)
+API_RETRY_BACKOFF = 0.3   # пауза перед повтором: backoff * 2^(n-1) секунд
+API_POOL_SIZE = 10        # соединений keep-alive на хост (не меньше числа потоков пула)
+SEARCH_DEBOUNCE_MS = 300  # пауза после ввода в поле поиска перед запросом к серверу
+EVENTS_READ_TIMEOUT = 60  # сервер шлёт пинг каждые 15 с; дольше тишины — соединение потеряно
+EVENTS_RECONNECT_DELAY = 5  # пауза перед переподключением к /events, секунд
+EVENTS_DEBOUNCE_MS = 500  # события за это время объединяются в одну синхронизацию
+
+
+def entity_path(entity_type, entity_id=None):
+    """Путь коллекции или записи сущности: /regions, /consumption/5 и т.п."""
+    path = "/consumption" if entity_type == "consumption" else f"/{entity_type}s"
+    return path if entity_id is None else f"{path}/{entity_id}"
+
+
+class ApiClient:
+    """Единая точка доступа к API для всех окон клиента.
+
+    Одна requests.Session держит соединения keep-alive в пуле, повторяет
+    идемпотентные запросы с нарастающей паузой при сбоях соединения и
+    ответах 502/503/504, запрашивает сжатые ответы и подставляет X-User-ID.
+    """
+
+    def __init__(self, base_url=API_BASE_URL, timeout=API_TIMEOUT, retries=API_RETRIES,
+                 backoff_factor=API_RETRY_BACKOFF, pool_size=API_POOL_SIZE):
+        self.base_url = base_url
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # gzip/deflate, а также br, если установлен модуль brotli и ответ можно распаковать
+        self.session.headers.update(make_headers(accept_encoding=True))
+        # Последние ответы справочников: путь -> (ETag, тело)
+        self._conditional_cache = {}
+
+    def set_user(self, user_id):
+        self.session.headers["X-User-ID"] = str(user_id)
+
+    def clear_user(self):
+        self.session.headers.pop("X-User-ID", None)
+        self._conditional_cache.clear()
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def stream(self, path):
+        """Долгий потоковый GET (Server-Sent Events) на отдельном соединении вне пула."""
+        headers = dict(self.session.headers, Accept="text/event-stream")
+        return requests.get(
+            f"{self.base_url}{path}",
+            headers=headers,
+            stream=True,
+            timeout=(self.timeout, EVENTS_READ_TIMEOUT)
+        )
+
+    def get_json_conditional(self, path):
+        """GET с If-None-Match: при 304 возвращается ранее полученное тело."""
+        headers = {}
+        cached = self._conditional_cache.get(path)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        response = self.get(path, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            self._conditional_cache[path] = (etag, data)
+        return data
+
+
+class ApiError(Exception):
+    """Ошибка, которую вернул сервер (текст из поля "error" ответа)."""
+
+
+def api_error_message(response, default="Неизвестная ошибка"):
+    try:
+        data = response.json()
+    except ValueError:
+        return default
+    return data.get("error", default) if isinstance(data, dict) else default
+
+
+def fetch_page(api, path, params=None, cursor=None):
+    """Загрузить одну страницу списка. Возвращает (items, next_cursor).
+
+    /consumption отдаёт данные страницами: {"items": [...], "next_cursor": ...},
+    остальные списки приходят целиком, и next_cursor для них всегда None.
+    params — параметры поиска и сортировки (q, sort).
+    """
+    params = dict(params or {})
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = api.get(path, params=params)
+    if response.status_code != 200:
+        raise ApiError(api_error_message(response))
+    data = response.json()
+    next_cursor = None
+    if isinstance(data, dict) and "items" in data:
+        next_cursor = data.get("next_cursor")
+        data = data["items"]
+    if not isinstance(data, list):
+        raise ApiError(api_error_message(response, "Некорректный ответ сервера"))
+    return data, next_cursor
+
+
+def fetch_sync_token(api, path):
+    """Текущий токен синхронизации списка или None, если сервер его не выдал."""
+    response = api.get(f"{path}/changes")
+    data = response.json() if response.status_code == 200 else None
+    return data.get("token") if isinstance(data, dict) else None
+
+
+def fetch_changes(api, path, token):
+    """Изменения списка после token: {"items", "deleted", "token"} или {"reset": true}."""
+    response = api.get(f"{path}/changes", params={"since": token})
+    if response.status_code != 200:
+        raise ApiError(api_error_message(response))
+    data = response.json()
+    if not isinstance(data, dict):
+        raise ApiError("Некорректный ответ сервера")
+    return data
+
+
+class TaskSignals(QObject):
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    progress = pyqtSignal(object)
+
+
+class RequestTask(QRunnable):
+    """Сетевой вызов в пуле потоков; результат и ошибки приходят сигналами в поток GUI."""
+
+    def __init__(self, fn, with_progress=False):
+        super().__init__()
+        self.fn = fn
+        self.with_progress = with_progress
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            if self.with_progress:
+                result = self.fn(self.signals.progress.emit)
+            else:
+                result = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.succeeded.emit(result)
+
+
+class EventSignals(QObject):
+    changed = pyqtSignal(str)
+    resync = pyqtSignal()
+
+
+class EventListener:
+    """Подписка на GET /events в фоновом потоке.
+
+    signals.changed(entity) приходит в поток GUI на каждое событие change,
+    signals.resync — по событию reset и после переподключения, когда
+    уведомления могли быть пропущены. При обрыве соединения подписка
+    восстанавливается через EVENTS_RECONNECT_DELAY секунд. Поток фоновый
+    (daemon) и после stop() завершается при ближайшем пинге сервера.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self.signals = EventSignals()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="events", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        connected_before = False
+        while not self._stopped.is_set():
+            try:
+                with self.api.stream("/events") as response:
+                    if response.status_code == 200:
+                        if connected_before:
+                            self._emit(self.signals.resync)
+                        connected_before = True
+                        self._read(response)
+            except (requests.RequestException, ValueError):
+                pass
+            self._stopped.wait(EVENTS_RECONNECT_DELAY)
+
+    def _read(self, response):
+        name, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stopped.is_set():
+                return
+            if not line:
+                if data:
+                    self._dispatch(name, "\n".join(data))
+                name, data = "message", []
+            elif not line.startswith(":"):
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    name = value
+                elif field == "data":
+                    data.append(value)
+
+    def _dispatch(self, name, data):
+        if name == "reset":
+            self._emit(self.signals.resync)
+        elif name == "change":
+            entity = json.loads(data).get("entity")
+            if entity:
+                self._emit(self.signals.changed, entity)
+
+    def _emit(self, signal, *args):
+        if not self._stopped.is_set():
+            signal.emit(*args)
+
+
+class ReferenceStore:
+    """Общий кэш справочных данных клиента для диалогов добавления/редактирования.
+
+    Наборы загружаются лениво или заполняются при обновлении вкладок.
+    Когда сущность изменяет сам клиент или о её изменении сообщает сервер
+    (GET /events), затронутые наборы сбрасываются и загружаются заново
+    в фоне (MainWindow.refill_references).
+    """
+    # Выпадающим спискам нужны только id и подпись: остальные поля не запрашиваются
+    ENTITY_URLS = {
+        "region": "/regions?fields=id,name",
+        "tariff": "/tariffs?fields=id,name",
+        "user": "/users?fields=id,login,role",
+        "building": "/buildings?fields=id,name",
+        "meter": "/meters?fields=id,serial_number",
+    }
+    # Изменение сущности задевает наборы, в которых она видна (каскадное удаление, имена)
+    DEPENDENTS = {
+        "region": ["building", "meter"],
+        "tariff": ["building"],
+        "user": ["building", "meter"],
+        "building": ["meter"],
+    }
+
+    def __init__(self, api):
+        self.api = api
+        self._data = {}
+        # Номер сброса каждого набора: ответ, запрошенный до сброса, не кладётся в кэш
+        self._versions = {}
+
+    def fetch(self, entity_type):
+        """Загрузить набор с сервера, не трогая кэш (можно вызывать из пула потоков)."""
+        data = self.api.get_json_conditional(self.ENTITY_URLS[entity_type])
+        if not isinstance(data, list):
+            raise ValueError("Invalid data format from API")
+        return data
+
+    def cached(self, entity_type):
+        """Загруженный набор или None, без обращения к серверу."""
+        return self._data.get(entity_type)
+
+    def version(self, entity_type):
+        return self._versions.get(entity_type, 0)
+
+    def put(self, entity_type, data, version=None):
+        if entity_type in self.ENTITY_URLS and (version is None or version == self.version(entity_type)):
+            self._data[entity_type] = data
+
+    def invalidate(self, *entity_types):
+        """Сбросить наборы entity_types (без аргументов — все) и зависящие от них.
+
+        Возвращает сброшенные наборы, которые были загружены.
+        """
+        if not entity_types:
+            entity_types = list(self.ENTITY_URLS)
+        dropped = []
+        for entity_type in entity_types:
+            for et in [entity_type] + self.DEPENDENTS.get(entity_type, []):
+                self._versions[et] = self.version(et) + 1
+                if self._data.pop(et, None) is not None:
+                    dropped.append(et)
+        return dropped
 
 
 class LoginDialog(QDialog):
@@ -51,111 +363,254 @@ class LoginDialog(QDialog):
             QMessageBox.critical(self, "Ошибка", "Введите логин и пароль!")
             return
 
-        try:
-            response = requests.post(
-                f"{API_BASE_URL}/login",
-                json={"login": login, "password": password},
-                timeout=10
-            )
+        def on_success(response):
+            self.login_button.setEnabled(True)
             if response.status_code == 200:
                 data = response.json()
                 self.parent.current_user_id = data["user_id"]
                 self.parent.current_user_role = data["role"]
-                HEADERS['X-User-ID'] = str(data["user_id"])
+                self.parent.api.set_user(data["user_id"])
                 self.accept()
             else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
+                error_msg = api_error_message(response)
                 QMessageBox.critical(self, "Ошибка", f"Неверный логин или пароль.\n{error_msg}")
-        except Exception as e:
+
+        def on_error(e):
+            self.login_button.setEnabled(True)
             QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться к серверу:\n{str(e)}")
 
+        self.login_button.setEnabled(False)
+        self.parent.run_async(
+            lambda: self.parent.api.post("/login", json={"login": login, "password": password}),
+            on_success=on_success,
+            on_error=on_error
+        )
+
 
-class EntityTableWidget(QTableWidget):
+def _text(field, empty=""):
+    def accessor(data):
+        value = data.get(field)
+        return empty if value is None or value == "" else str(value)
+    return accessor
+
+
+# Заголовок колонки -> функция, извлекающая текст ячейки из записи API
+COLUMN_ACCESSORS = {
+    "ID": _text("id"),
+    "Название": _text("name"),
+    "Часовой пояс": _text("timezone"),
+    "Цена за кВт·ч": _text("rate_per_kwh"),
+    "С": _text("valid_from"),
+    "По": _text("valid_to", "-"),
+    "Логин": _text("login"),
+    "Роль": _text("role"),
+    "Адрес": _text("address"),
+    "Тип": _text("type"),
+    "Регион": _text("region_name"),
+    "Тариф": _text("tariff_name"),
+    "Владелец": _text("owner_login"),
+    "Серийный номер": _text("serial_number"),
+    "Дата установки": _text("installation_date"),
+    "Период с": _text("period_start"),
+    "Период по": _text("period_end"),
+    "кВт·ч": _text("consumption_kwh"),
+    "Оценка (руб)": _text("estimated_cost_rub", "-"),
+    "Счётчик": lambda data: data.get("meter_serial") or str(data.get("meter_id", "")),
+    # Для вкладки "Счётчики"
+    "Объект": lambda data: data.get("building_name")
+                           or data.get("building")
+                           or str(data.get("building_id", "")),
+}
+
+
+# Колонки, по которым сервер умеет сортировать список: заголовок -> значение ?sort=
+SERVER_SORTS = {
+    "building": {"ID": "id", "Название": "name", "Адрес": "address"},
+    "meter": {"ID": "id", "Серийный номер": "serial_number"},
+    "consumption": {"ID": "id", "Период с": "period_start"},
+}
+
+
+# Списки, в которых видны поля сущности или её каскадно удаляемые строки
+TABLE_DEPENDENTS = {
+    "region": ["building"],
+    "tariff": ["building", "consumption"],
+    "user": ["building"],
+    "building": ["meter", "consumption"],
+    "meter": ["consumption"],
+}
+
+
+class EntityTableModel(QAbstractTableModel):
+    """Модель таблицы сущностей: данные хранятся по колонкам в виде готовых строк.
+
+    Текст ячеек вычисляется один раз при загрузке страницы, а представление
+    запрашивает только видимые строки. Если у списка есть следующая страница
+    (next_cursor), она догружается через fetch_more_handler, когда
+    пользователь прокручивает таблицу до конца.
+    """
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.headers = columns
+        self.accessors = [COLUMN_ACCESSORS[column] for column in columns]
+        self.ids = []
+        self.cells = [[] for _ in columns]
+        self.rows_by_id = {}
+        self.next_cursor = None
+        self.fetching = False
+        self.fetch_more_handler = None
+        # Параметры (q, sort), с которыми загружены строки; с ними же догружаются страницы
+        self.query_params = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.cells[index.column()][index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def entity_id(self, row):
+        return self.ids[row] if 0 <= row < len(self.ids) else None
+
+    def set_rows(self, data_list, next_cursor=None):
+        self.beginResetModel()
+        self.ids = []
+        self.cells = [[] for _ in self.headers]
+        self.rows_by_id = {}
+        self._extend([data for data in data_list if isinstance(data, dict)])
+        self.next_cursor = next_cursor
+        self.fetching = False
+        self.endResetModel()
+
+    def append_rows(self, data_list, next_cursor=None):
+        self.next_cursor = next_cursor
+        self.fetching = False
+        self.upsert_rows(data_list)
+
+    def upsert_rows(self, data_list):
+        """Обновить строки с известными id на месте, остальные добавить в конец."""
+        new_rows = []
+        last_column = len(self.headers) - 1
+        for data in data_list:
+            if not isinstance(data, dict):
+                continue
+            row = self.rows_by_id.get(data.get("id"))
+            if row is None:
+                new_rows.append(data)
+                continue
+            for cells, accessor in zip(self.cells, self.accessors):
+                cells[row] = accessor(data)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+        if new_rows:
+            first = len(self.ids)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            self._extend(new_rows)
+            self.endInsertRows()
+
+    def appends_in_order(self, entity_ids):
+        """Новые id можно дописать в конец без нарушения порядка.
+
+        Так можно, только если список загружен целиком, отсортирован по
+        возрастанию id и новые id больше загруженных.
+        """
+        if self.next_cursor is not None or self.query_params.get("sort", "id") != "id":
+            return False
+        return not self.ids or min(entity_ids) > max(self.ids)
+
+    def remove_ids(self, entity_ids):
+        rows = sorted((self.rows_by_id[i] for i in set(entity_ids) if i in self.rows_by_id), reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.ids[row]
+            for cells in self.cells:
+                del cells[row]
+            self.endRemoveRows()
+        if rows:
+            self.rows_by_id = {entity_id: row for row, entity_id in enumerate(self.ids)}
+
+    def _extend(self, data_list):
+        first = len(self.ids)
+        self.ids.extend(data.get("id") for data in data_list)
+        self.rows_by_id.update((self.ids[row], row) for row in range(first, len(self.ids)))
+        for cells, accessor in zip(self.cells, self.accessors):
+            cells.extend(map(accessor, data_list))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.next_cursor is not None and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent) and self.fetch_more_handler:
+            self.fetching = True
+            self.fetch_more_handler(self.next_cursor)
+
+
+class EntityTableView(QTableView):
     def __init__(self, parent, entity_type, columns, main_window, editable_fields=None):
         super().__init__(parent)
         self.entity_type = entity_type
         self.columns = columns
         self.main_window = main_window
         self.editable_fields = editable_fields or []
-        self.setColumnCount(len(columns))
-        self.setHorizontalHeaderLabels(columns)
+        self.table_model = EntityTableModel(columns, self)
+        self.setModel(self.table_model)
         self.horizontalHeader().setStretchLastSection(True)
+        # Строки одной высоты: представлению не нужно измерять каждую строку
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.cellDoubleClicked.connect(self.on_cell_double_clicked)
+        self.doubleClicked.connect(self.on_double_clicked)
+
+        # Сортировка выполняется сервером: щелчок по заголовку перезагружает список
+        self.sort_keys = SERVER_SORTS.get(entity_type, {})
+        self.sort_param = None
+        self.sort_indicator = (-1, Qt.SortOrder.AscendingOrder)
+        if self.sort_keys:
+            header = self.horizontalHeader()
+            header.setSectionsClickable(True)
+            header.setSortIndicatorShown(True)
+            header.setSortIndicator(*self.sort_indicator)
+            header.sortIndicatorChanged.connect(self.on_sort_changed)
+
+    def on_sort_changed(self, column, order):
+        key = self.sort_keys.get(self.columns[column])
+        if key is None:
+            # Колонка не сортируется на сервере: вернуть прежний индикатор
+            header = self.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(*self.sort_indicator)
+            header.blockSignals(False)
+            return
+        self.sort_indicator = (column, order)
+        self.sort_param = f"-{key}" if order == Qt.SortOrder.DescendingOrder else key
+        self.main_window.refresh_data(self.entity_type)
 
-    def on_cell_double_clicked(self, row, col):
+    def on_double_clicked(self, index):
         # Арендатор не может редактировать ничего
         if self.main_window.current_user_role == "tenant":
             return
         if self.main_window.current_user_role == "accountant" and self.entity_type == "building":
             return
 
-        item = self.item(row, 0)
-        if item:
-            entity_id = int(item.text())
+        entity_id = self.table_model.entity_id(index.row())
+        if entity_id is not None:
             self.main_window.edit_entity(self.entity_type, entity_id)
 
-    def populate_table(self, data_list):
-        self.setRowCount(0)
-        for data in data_list:
-            if not isinstance(data, dict):
-                continue
-            row_position = self.rowCount()
-            self.insertRow(row_position)
-            for col_idx, field in enumerate(self.columns):
-                value = ""
-                if field == "ID":
-                    value = str(data.get("id", ""))
-                elif field == "Название":
-                    value = data.get("name", "")
-                elif field == "Часовой пояс":
-                    value = data.get("timezone", "")
-                elif field == "Цена за кВт·ч":
-                    value = str(data.get("rate_per_kwh", ""))
-                elif field == "С":
-                    value = data.get("valid_from", "")
-                elif field == "По":
-                    value = data.get("valid_to", "") or "-"
-                elif field == "Логин":
-                    value = data.get("login", "")
-                elif field == "Роль":
-                    value = data.get("role", "")
-                elif field == "Адрес":
-                    value = data.get("address", "")
-                elif field == "Тип":
-                    value = data.get("type", "")
-                elif field == "Регион":
-                    value = data.get("region_name", "") or ""
-                elif field == "Тариф":
-                    value = data.get("tariff_name", "") or ""
-                elif field == "Владелец":
-                    value = data.get("owner_login", "") or ""
-                elif field == "Серийный номер":
-                    value = data.get("serial_number", "") or ""
-                elif field == "Дата установки":
-                    value = data.get("installation_date", "") or ""
-                elif field == "Период с":
-                    value = data.get("period_start", "") or ""
-                elif field == "Период по":
-                    value = data.get("period_end", "") or ""
-                elif field == "кВт·ч":
-                    value = str(data.get("consumption_kwh", ""))
-                elif field == "Оценка (руб)":
-                    cost = data.get("estimated_cost_rub")
-                    value = str(cost) if cost is not None else "-"
-                elif field == "Счётчик":
-                    meter_serial = data.get("meter_serial")
-                    value = meter_serial if meter_serial else str(data.get("meter_id", ""))
-                elif field == "Объект":
-                    # Для вкладки "Счётчики"
-                    value = data.get("building_name") \
-                            or data.get("building") \
-                            or str(data.get("building_id", ""))
-
-                item = QTableWidgetItem(value)
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                self.setItem(row_position, col_idx, item)
+    def entity_id_at(self, row):
+        return self.table_model.entity_id(row)
+
+    def selected_entity_id(self):
+        selected_rows = self.selectionModel().selectedRows()
+        return self.entity_id_at(selected_rows[0].row()) if selected_rows else None
 
 
 class EditEntityDialog(QDialog):
@@ -166,6 +621,8 @@ class EditEntityDialog(QDialog):
         self.entity_data = entity_data
         self.parent = parent
         self.main_window = main_window
+        self.save_btn = QPushButton("Сохранить")
+        self.save_btn.clicked.connect(self.save_changes)
 
         layout = QFormLayout()
         self.id_field = QLineEdit(str(entity_data["id"]))
@@ -253,96 +710,74 @@ class EditEntityDialog(QDialog):
             layout.addRow("Роль:", self.role_combo)
 
         button_layout = QHBoxLayout()
-        save_btn = QPushButton("Сохранить")
-        save_btn.clicked.connect(self.save_changes)
         cancel_btn = QPushButton("Отмена")
         cancel_btn.clicked.connect(self.reject)
-        button_layout.addWidget(save_btn)
+        button_layout.addWidget(self.save_btn)
         button_layout.addWidget(cancel_btn)
         layout.addRow(button_layout)
         self.setLayout(layout)
 
     def load_dropdowns(self):
-        try:
-            regions = requests.get(f"{API_BASE_URL}/regions", headers=HEADERS).json()
-            tariffs = requests.get(f"{API_BASE_URL}/tariffs", headers=HEADERS).json()
-            users = requests.get(f"{API_BASE_URL}/users", headers=HEADERS).json()
-            if not isinstance(regions, list) or not isinstance(tariffs, list) or not isinstance(users, list):
-                raise ValueError("Invalid data format from API")
-            self.region_combo.clear()
-            for r in regions:
-                self.region_combo.addItem(r["name"], r["id"])
-            self.tariff_combo.clear()
-            for t in tariffs:
-                self.tariff_combo.addItem(t["name"], t["id"])
-            self.user_combo.clear()
-            for u in users:
-                self.user_combo.addItem(f"{u['login']} ({u['role']})", u["id"])
-
-            current_region_id = self.entity_data.get("region_id")
-            idx = self.region_combo.findData(current_region_id)
-            if idx >= 0:
-                self.region_combo.setCurrentIndex(idx)
+        self.main_window.load_references(
+            self, [self.region_combo, self.tariff_combo, self.user_combo],
+            ["region", "tariff", "user"], self.fill_dropdowns, "Не удалось загрузить данные"
+        )
 
-            current_tariff_id = self.entity_data.get("tariff_id")
-            idx = self.tariff_combo.findData(current_tariff_id)
-            if idx >= 0:
-                self.tariff_combo.setCurrentIndex(idx)
-
-            current_user_id = self.entity_data.get("user_id")
-            idx = self.user_combo.findData(current_user_id)
-            if idx >= 0:
-                self.user_combo.setCurrentIndex(idx)
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные:\n{str(e)}")
+    def fill_dropdowns(self, regions, tariffs, users):
+        self.region_combo.clear()
+        for r in regions:
+            self.region_combo.addItem(r["name"], r["id"])
+        self.tariff_combo.clear()
+        for t in tariffs:
+            self.tariff_combo.addItem(t["name"], t["id"])
+        self.user_combo.clear()
+        for u in users:
+            self.user_combo.addItem(f"{u['login']} ({u['role']})", u["id"])
+
+        current_region_id = self.entity_data.get("region_id")
+        idx = self.region_combo.findData(current_region_id)
+        if idx >= 0:
+            self.region_combo.setCurrentIndex(idx)
+
+        current_tariff_id = self.entity_data.get("tariff_id")
+        idx = self.tariff_combo.findData(current_tariff_id)
+        if idx >= 0:
+            self.tariff_combo.setCurrentIndex(idx)
+
+        current_user_id = self.entity_data.get("user_id")
+        idx = self.user_combo.findData(current_user_id)
+        if idx >= 0:
+            self.user_combo.setCurrentIndex(idx)
 
     def load_buildings(self):
-        try:
-            if self.main_window.current_user_role == "tenant":
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(buildings, list):
-                    raise ValueError("Invalid data format for buildings")
-                user_id = self.main_window.current_user_id
-                buildings = [b for b in buildings if b.get("user_id") == user_id]
-            else:
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(buildings, list):
-                    raise ValueError("Invalid data format for buildings")
-
-            self.building_combo.clear()
-            for b in buildings:
-                self.building_combo.addItem(b["name"], b["id"])
-            current_building_id = self.entity_data.get("building_id")
-            idx = self.building_combo.findData(current_building_id)
-            if idx >= 0:
-                self.building_combo.setCurrentIndex(idx)
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить объекты:\n{str(e)}")
+        # Для арендатора сервер сам отдаёт только его объекты
+        self.main_window.load_references(
+            self, [self.building_combo], ["building"], self.fill_buildings, "Не удалось загрузить объекты"
+        )
+
+    def fill_buildings(self, buildings):
+        self.building_combo.clear()
+        for b in buildings:
+            self.building_combo.addItem(b["name"], b["id"])
+        current_building_id = self.entity_data.get("building_id")
+        idx = self.building_combo.findData(current_building_id)
+        if idx >= 0:
+            self.building_combo.setCurrentIndex(idx)
 
     def load_meters(self):
-        try:
-            if self.main_window.current_user_role == "tenant":
-                meters = requests.get(f"{API_BASE_URL}/meters", headers=HEADERS).json()
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(meters, list) or not isinstance(buildings, list):
-                    raise ValueError("Invalid data format")
-                user_id = self.main_window.current_user_id
-                building_ids = [b["id"] for b in buildings if b.get("user_id") == user_id]
-                meters = [m for m in meters if m.get("building_id") in building_ids]
-            else:
-                meters = requests.get(f"{API_BASE_URL}/meters", headers=HEADERS).json()
-                if not isinstance(meters, list):
-                    raise ValueError("Invalid data format for meters")
-
-            self.meter_combo.clear()
-            for m in meters:
-                self.meter_combo.addItem(m["serial_number"], m["id"])
-            current_meter_id = self.entity_data.get("meter_id")
-            idx = self.meter_combo.findData(current_meter_id)
-            if idx >= 0:
-                self.meter_combo.setCurrentIndex(idx)
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить счётчики:\n{str(e)}")
+        # Для арендатора сервер сам отдаёт только счётчики его объектов
+        self.main_window.load_references(
+            self, [self.meter_combo], ["meter"], self.fill_meters, "Не удалось загрузить счётчики"
+        )
+
+    def fill_meters(self, meters):
+        self.meter_combo.clear()
+        for m in meters:
+            self.meter_combo.addItem(m["serial_number"], m["id"])
+        current_meter_id = self.entity_data.get("meter_id")
+        idx = self.meter_combo.findData(current_meter_id)
+        if idx >= 0:
+            self.meter_combo.setCurrentIndex(idx)
 
     def save_changes(self):
         data = {}
@@ -415,23 +850,30 @@ class EditEntityDialog(QDialog):
                 "role_id": 1 if role == "tenant" else (2 if role == "accountant" else 3)
             }
 
-        try:
-            if self.entity_type == "consumption":
-                url = f"{API_BASE_URL}/consumption/{self.entity_data['id']}"
-            else:
-                url = f"{API_BASE_URL}/{self.entity_type}s/{self.entity_data['id']}"
+        path = entity_path(self.entity_type, self.entity_data['id'])
 
-            response = requests.put(url, json=data, headers=HEADERS, timeout=10)
+        def on_success(response):
+            self.save_btn.setEnabled(True)
             if response.status_code == 200:
                 QMessageBox.information(self, "Успех", "Запись успешно обновлена!")
                 self.accept()
-                self.parent.refresh_data(self.entity_type)
+                self.main_window.sync_changes(self.entity_type)
             else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
+                error_msg = api_error_message(response)
                 QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить:\n{error_msg}")
-        except Exception as e:
+
+        def on_error(e):
+            self.save_btn.setEnabled(True)
             QMessageBox.critical(self, "Ошибка", f"Ошибка подключения:\n{str(e)}")
 
+        self.save_btn.setEnabled(False)
+        self.main_window.run_async(
+            lambda: self.main_window.api.put(path, json=data),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=self.entity_type
+        )
+
 
 class AddEntityDialog(QDialog):
     def __init__(self, parent, entity_type, main_window):
@@ -440,6 +882,8 @@ class AddEntityDialog(QDialog):
         self.entity_type = entity_type
         self.parent = parent
         self.main_window = main_window
+        self.save_btn = QPushButton("Добавить")
+        self.save_btn.clicked.connect(self.add_entity)
         layout = QFormLayout()
 
         if entity_type == "region":
@@ -502,73 +946,51 @@ class AddEntityDialog(QDialog):
             layout.addRow("кВт·ч:", self.kwh_field)
 
         button_layout = QHBoxLayout()
-        save_btn = QPushButton("Добавить")
-        save_btn.clicked.connect(self.add_entity)
         cancel_btn = QPushButton("Отмена")
         cancel_btn.clicked.connect(self.reject)
-        button_layout.addWidget(save_btn)
+        button_layout.addWidget(self.save_btn)
         button_layout.addWidget(cancel_btn)
         layout.addRow(button_layout)
         self.setLayout(layout)
 
     def load_dropdowns(self):
-        try:
-            regions = requests.get(f"{API_BASE_URL}/regions", headers=HEADERS).json()
-            tariffs = requests.get(f"{API_BASE_URL}/tariffs", headers=HEADERS).json()
-            users = requests.get(f"{API_BASE_URL}/users", headers=HEADERS).json()
-            if not isinstance(regions, list) or not isinstance(tariffs, list) or not isinstance(users, list):
-                raise ValueError("Invalid data format from API")
-            self.region_combo.clear()
-            for r in regions:
-                self.region_combo.addItem(r["name"], r["id"])
-            self.tariff_combo.clear()
-            for t in tariffs:
-                self.tariff_combo.addItem(t["name"], t["id"])
-            self.user_combo.clear()
-            for u in users:
-                self.user_combo.addItem(f"{u['login']} ({u['role']})", u["id"])
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные:\n{str(e)}")
+        self.main_window.load_references(
+            self, [self.region_combo, self.tariff_combo, self.user_combo],
+            ["region", "tariff", "user"], self.fill_dropdowns, "Не удалось загрузить данные"
+        )
+
+    def fill_dropdowns(self, regions, tariffs, users):
+        self.region_combo.clear()
+        for r in regions:
+            self.region_combo.addItem(r["name"], r["id"])
+        self.tariff_combo.clear()
+        for t in tariffs:
+            self.tariff_combo.addItem(t["name"], t["id"])
+        self.user_combo.clear()
+        for u in users:
+            self.user_combo.addItem(f"{u['login']} ({u['role']})", u["id"])
 
     def load_buildings(self):
-        try:
-            if self.main_window.current_user_role == "tenant":
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(buildings, list):
-                    raise ValueError("Invalid data format")
-                user_id = self.main_window.current_user_id
-                buildings = [b for b in buildings if b.get("user_id") == user_id]
-            else:
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(buildings, list):
-                    raise ValueError("Invalid data format")
+        # Для арендатора сервер сам отдаёт только его объекты
+        self.main_window.load_references(
+            self, [self.building_combo], ["building"], self.fill_buildings, "Не удалось загрузить объекты"
+        )
 
-            self.building_combo.clear()
-            for b in buildings:
-                self.building_combo.addItem(b["name"], b["id"])
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить объекты:\n{str(e)}")
+    def fill_buildings(self, buildings):
+        self.building_combo.clear()
+        for b in buildings:
+            self.building_combo.addItem(b["name"], b["id"])
 
     def load_meters(self):
-        try:
-            if self.main_window.current_user_role == "tenant":
-                meters = requests.get(f"{API_BASE_URL}/meters", headers=HEADERS).json()
-                buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-                if not isinstance(meters, list) or not isinstance(buildings, list):
-                    raise ValueError("Invalid data format")
-                user_id = self.main_window.current_user_id
-                building_ids = [b["id"] for b in buildings if b.get("user_id") == user_id]
-                meters = [m for m in meters if m.get("building_id") in building_ids]
-            else:
-                meters = requests.get(f"{API_BASE_URL}/meters", headers=HEADERS).json()
-                if not isinstance(meters, list):
-                    raise ValueError("Invalid data format")
+        # Для арендатора сервер сам отдаёт только счётчики его объектов
+        self.main_window.load_references(
+            self, [self.meter_combo], ["meter"], self.fill_meters, "Не удалось загрузить счётчики"
+        )
 
-            self.meter_combo.clear()
-            for m in meters:
-                self.meter_combo.addItem(m["serial_number"], m["id"])
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить счётчики:\n{str(e)}")
+    def fill_meters(self, meters):
+        self.meter_combo.clear()
+        for m in meters:
+            self.meter_combo.addItem(m["serial_number"], m["id"])
 
     def add_entity(self):
         data = {}
@@ -648,23 +1070,30 @@ class AddEntityDialog(QDialog):
                 "consumption_kwh": kwh
             }
 
-        try:
-            if self.entity_type == "consumption":
-                url = f"{API_BASE_URL}/consumption"
-            else:
-                url = f"{API_BASE_URL}/{self.entity_type}s"
+        path = entity_path(self.entity_type)
 
-            response = requests.post(url, json=data, headers=HEADERS, timeout=10)
+        def on_success(response):
+            self.save_btn.setEnabled(True)
             if response.status_code == 201:
                 QMessageBox.information(self, "Успех", "Запись успешно добавлена!")
                 self.accept()
-                self.parent.refresh_data(self.entity_type)
+                self.main_window.sync_changes(self.entity_type)
             else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
+                error_msg = api_error_message(response)
                 QMessageBox.critical(self, "Ошибка", f"Не удалось добавить запись:\n{error_msg}")
-        except Exception as e:
+
+        def on_error(e):
+            self.save_btn.setEnabled(True)
             QMessageBox.critical(self, "Ошибка", f"Ошибка подключения:\n{str(e)}")
 
+        self.save_btn.setEnabled(False)
+        self.main_window.run_async(
+            lambda: self.main_window.api.post(path, json=data),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=self.entity_type
+        )
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -673,6 +1102,23 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 1200, 800)
         self.current_user_id = None
         self.current_user_role = None
+        # Общий HTTP-клиент и справочные данные для всех окон
+        self.api = ApiClient()
+        self.store = ReferenceStore(self.api)
+        # Сетевые запросы выполняются в пуле, чтобы не блокировать окно
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(6)
+        self._pending_signals = set()
+        self._busy_counts = {}
+        self._refresh_generation = {}
+        self._sync_tokens = {}
+        # Подписка на уведомления сервера; события копятся и применяются пачкой
+        self.events = None
+        self._changed_entities = set()
+        self._events_timer = QTimer(self)
+        self._events_timer.setSingleShot(True)
+        self._events_timer.setInterval(EVENTS_DEBOUNCE_MS)
+        self._events_timer.timeout.connect(self.apply_server_changes)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -700,6 +1146,7 @@ class MainWindow(QMainWindow):
             self.user_info_label.setText(f"Вы вошли как: {self.current_user_role} (ID: {self.current_user_id})")
             self.update_ui_for_role(self.current_user_role)
             self.refresh_all_data()
+            self.start_events()
         else:
             sys.exit()
 
@@ -781,7 +1228,21 @@ class MainWindow(QMainWindow):
             "consumption": ["ID", "Счётчик", "Период с", "Период по", "кВт·ч", "Оценка (руб)"]
         }
 
-        table = EntityTableWidget(widget, entity_type, columns_map[entity_type], self)
+        # Поиск по префиксу выполняет сервер; запрос уходит после паузы в наборе
+        if entity_type in SERVER_SORTS:
+            search_field = QLineEdit()
+            search_field.setPlaceholderText("Поиск…")
+            search_field.setClearButtonEnabled(True)
+            search_timer = QTimer(widget)
+            search_timer.setSingleShot(True)
+            search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+            search_timer.timeout.connect(lambda: self.refresh_data(entity_type))
+            search_field.textChanged.connect(search_timer.start)
+            layout.addWidget(search_field)
+            widget.search_field = search_field
+
+        table = EntityTableView(widget, entity_type, columns_map[entity_type], self)
+        table.table_model.fetch_more_handler = lambda cursor, et=entity_type: self.load_more(et, cursor)
         layout.addWidget(table)
         setattr(widget, 'table', table)
 
@@ -793,8 +1254,14 @@ class MainWindow(QMainWindow):
             )
 
         refresh_btn = QPushButton("Обновить")
-        refresh_btn.clicked.connect(lambda: self.refresh_data(entity_type))
+        refresh_btn.clicked.connect(lambda: self.sync_data(entity_type))
         layout.addWidget(refresh_btn)
+
+        busy_label = QLabel("Загрузка…")
+        busy_label.setVisible(False)
+        layout.addWidget(busy_label)
+        widget.refresh_button = refresh_btn
+        widget.busy_label = busy_label
         return widget
 
     def delete_selected_entity(self, entity_type):
@@ -813,26 +1280,16 @@ class MainWindow(QMainWindow):
         if not table:
             return
 
-        selected_rows = table.selectionModel().selectedRows()
-        if not selected_rows:
+        entity_id = table.selected_entity_id()
+        if entity_id is None:
             QMessageBox.warning(self, "Ошибка", "Выберите запись для удаления")
             return
 
-        row = selected_rows[0].row()
-        item = table.item(row, 0)
-        if not item:
-            return
-
-        entity_id = int(item.text())
         self.delete_entity(entity_type, entity_id)
     def show_context_menu(self, pos, table, entity_type):
-        row = table.rowAt(pos.y())
-        if row < 0:
+        entity_id = table.entity_id_at(table.rowAt(pos.y()))
+        if entity_id is None:
             return
-        item = table.item(row, 0)
-        if not item:
-            return
-        entity_id = int(item.text())
 
         context_menu = QMenu(self)
         delete_action = QAction("Удалить", self)
@@ -854,64 +1311,309 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.No:
             return
 
-        try:
-            if entity_type == "consumption":
-                url = f"{API_BASE_URL}/consumption/{entity_id}"
-            else:
-                url = f"{API_BASE_URL}/{entity_type}s/{entity_id}"
+        path = entity_path(entity_type, entity_id)
 
-            response = requests.delete(url, headers=HEADERS, timeout=10)
+        def on_success(response):
             if response.status_code in (200, 204):
                 QMessageBox.information(self, "Успех", "Запись успешно удалена!")
-                self.refresh_data(entity_type)
+                self.sync_changes(entity_type)
             else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
+                error_msg = api_error_message(response)
                 QMessageBox.critical(self, "Ошибка", f"Не удалось удалить запись:\n{error_msg}")
-        except Exception as e:
+
+        def on_error(e):
             QMessageBox.critical(self, "Ошибка", f"Ошибка подключения:\n{str(e)}")
 
-    def refresh_data(self, entity_type):
-        try:
-            url = f"{API_BASE_URL}/{entity_type}s" if entity_type != "consumption" else f"{API_BASE_URL}/consumption"
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if not isinstance(data, list):
-                    error_msg = data.get("error", "Некорректный ответ сервера") if isinstance(data, dict) else str(data)
-                    QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные:\n{error_msg}")
-                    return
-                for i in range(self.tab_widget.count()):
-                    tab = self.tab_widget.widget(i)
-                    tab_name = self.tab_widget.tabText(i)
-                    enames = [("Регионы","region"), ("Тарифы","tariff"), ("Пользователи","user"),
-                              ("Объекты учёта","building"), ("Счётчики","meter"), ("Показания потребления","consumption")]
-                    if any(tab_name == name and etype == entity_type for name, etype in enames):
-                        table = getattr(tab, 'table', None)
-                        if table:
-                            table.populate_table(data)
-                        break
+        self.run_async(
+            lambda: self.api.delete(path),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=entity_type
+        )
+
+    def find_table(self, entity_type):
+        tab = self.find_tab(entity_type)
+        return getattr(tab, 'table', None) if tab is not None else None
+
+    def find_tab(self, key):
+        """Вкладка сущности (по entity_type таблицы) или вкладка отчётов ("report")."""
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            table = getattr(tab, 'table', None)
+            if (table and table.entity_type == key) or (key == "report" and hasattr(tab, "generate_report_button")):
+                return tab
+        return None
+
+    def run_async(self, fn, on_success=None, on_error=None, on_progress=None, entity_type=None):
+        """Выполнить сетевой вызов fn в пуле потоков.
+
+        Колбэки вызываются в потоке GUI. Пока вызов не завершён, вкладка
+        entity_type показывает состояние загрузки. Если задан on_progress,
+        fn получает функцию для передачи промежуточных результатов.
+        """
+        task = RequestTask(fn, with_progress=on_progress is not None)
+        signals = task.signals
+        self._pending_signals.add(signals)
+        self.set_busy(entity_type, True)
+
+        def finish():
+            self._pending_signals.discard(signals)
+            self.set_busy(entity_type, False)
+
+        def succeeded(result):
+            finish()
+            if on_success:
+                on_success(result)
+
+        def failed(error):
+            finish()
+            if on_error:
+                on_error(error)
             else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
-                QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные:\n{error_msg}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться к серверу:\n{str(e)}")
+                QMessageBox.critical(self, "Ошибка", f"Ошибка подключения:\n{str(error)}")
 
-    def refresh_all_data(self):
-        role = self.current_user_role
+        if on_progress:
+            signals.progress.connect(on_progress)
+        signals.succeeded.connect(succeeded)
+        signals.failed.connect(failed)
+        self.pool.start(task)
 
-        if role == "admin":
-            entities = ["region", "tariff", "user", "building", "meter", "consumption"]
+    def set_busy(self, key, busy):
+        if key is None:
+            return
+        count = self._busy_counts.get(key, 0) + (1 if busy else -1)
+        self._busy_counts[key] = count
+        tab = self.find_tab(key)
+        if tab is None:
+            return
+        if hasattr(tab, "busy_label"):
+            tab.busy_label.setVisible(count > 0)
+        if hasattr(tab, "refresh_button"):
+            tab.refresh_button.setEnabled(count == 0)
+        if hasattr(tab, "generate_report_button"):
+            tab.generate_report_button.setEnabled(count == 0)
+
+    def list_params(self, entity_type):
+        """Параметры поиска и сортировки списка из полей вкладки."""
+        tab = self.find_tab(entity_type)
+        params = {}
+        search_field = getattr(tab, "search_field", None)
+        if search_field is not None and search_field.text().strip():
+            params["q"] = search_field.text().strip()
+        if tab is not None and getattr(tab.table, "sort_param", None):
+            params["sort"] = tab.table.sort_param
+        return params
+
+    def refresh_data(self, entity_type):
+        path = entity_path(entity_type)
+        table = self.find_table(entity_type)
+        params = self.list_params(entity_type)
+        # Ответы устаревшего обновления (если успели запустить новое) отбрасываются
+        generation = self._refresh_generation.get(entity_type, 0) + 1
+        self._refresh_generation[entity_type] = generation
+
+        def on_success(result):
+            token, (items, next_cursor) = result
+            if self._refresh_generation.get(entity_type) != generation:
+                return
+            self._sync_tokens[entity_type] = token
+            if table:
+                table.table_model.query_params = params
+                table.table_model.set_rows(items, next_cursor)
+            if next_cursor is None and "q" not in params:
+                # Полный список заодно обновляет справочник для диалогов
+                self.store.put(entity_type, items)
+
+        def on_error(e):
+            if self._refresh_generation.get(entity_type) == generation:
+                self.show_load_error(e)
+
+        def load():
+            # Токен берётся до списка: изменения между ними придут при синхронизации
+            token = fetch_sync_token(self.api, path) if "q" not in params else None
+            return token, fetch_page(self.api, path, params)
+
+        self.run_async(
+            load,
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=entity_type
+        )
+
+    def sync_data(self, entity_type):
+        """Применить к таблице изменения с прошлой загрузки (GET .../changes).
+
+        Без токена, при активном поиске, по ответу reset или если новые
+        строки нельзя поставить на место (сортировка, недогруженные
+        страницы) список загружается заново.
+        """
+        token = self._sync_tokens.get(entity_type)
+        if token is None or "q" in self.list_params(entity_type):
+            self.refresh_data(entity_type)
+            return
+        path = entity_path(entity_type)
+        model = self.find_table(entity_type).table_model
+        generation = self._refresh_generation.get(entity_type, 0)
+
+        def on_success(changes):
+            if self._refresh_generation.get(entity_type) != generation:
+                return
+            if changes.get("reset"):
+                self.refresh_data(entity_type)
+                return
+            items = changes.get("items", [])
+            new_ids = [item.get("id") for item in items if item.get("id") not in model.rows_by_id]
+            if new_ids and not model.appends_in_order(new_ids):
+                self.refresh_data(entity_type)
+                return
+            model.remove_ids(changes.get("deleted", []))
+            model.upsert_rows(items)
+            self._sync_tokens[entity_type] = changes.get("token")
+
+        def on_error(e):
+            if self._refresh_generation.get(entity_type) == generation:
+                self.show_load_error(e)
+
+        self.run_async(
+            lambda: fetch_changes(self.api, path, token),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=entity_type
+        )
 
-        elif role == "accountant":
-            entities = ["tariff", "building", "meter", "consumption"]
+    def sync_changes(self, *entity_types):
+        """Синхронизировать изменённые сущности, списки и справочники, которые они задевают."""
+        self.refill_references(*self.store.invalidate(*entity_types))
+        pending = list(entity_types)
+        affected = []
+        while pending:
+            et = pending.pop()
+            if et not in affected:
+                affected.append(et)
+                pending.extend(TABLE_DEPENDENTS.get(et, []))
+        loaded = self.role_entities(self.current_user_role)
+        for et in affected:
+            if et in loaded:
+                self.sync_data(et)
+
+    def load_references(self, dialog, widgets, entity_types, on_loaded, error_text):
+        """Передать наборы справочника в on_loaded(*наборы) в порядке entity_types.
+
+        Незагруженные наборы запрашиваются в пуле потоков; до ответа widgets
+        и кнопка сохранения диалога недоступны.
+        """
+        cached = {et: self.store.cached(et) for et in entity_types}
+        missing = [et for et, data in cached.items() if data is None]
+        if not missing:
+            on_loaded(*cached.values())
+            return
+        versions = {et: self.store.version(et) for et in missing}
+
+        def on_success(fetched):
+            for et, data in fetched.items():
+                self.store.put(et, data, versions[et])
+            cached.update(fetched)
+            on_loaded(*cached.values())
+            for widget in widgets + [dialog.save_btn]:
+                widget.setEnabled(True)
+
+        def on_error(e):
+            QMessageBox.warning(dialog, "Ошибка", f"{error_text}:\n{str(e)}")
+
+        for widget in widgets + [dialog.save_btn]:
+            widget.setEnabled(False)
+        self.run_async(
+            lambda: {et: self.store.fetch(et) for et in missing},
+            on_success=on_success,
+            on_error=on_error
+        )
 
-        elif role == "tenant":
-            entities = ["building", "meter", "consumption"]
+    def refill_references(self, *entity_types):
+        """Загрузить сброшенные наборы справочника в фоне, чтобы диалоги открывались без ожидания сети."""
+        for et in dict.fromkeys(entity_types):
+            version = self.store.version(et)
+            self.run_async(
+                lambda et=et: self.store.fetch(et),
+                on_success=lambda data, et=et, version=version: self.store.put(et, data, version),
+                # Не загрузился — диалог запросит набор сам, как до сброса
+                on_error=lambda e: None
+            )
 
+    def start_events(self):
+        """Подписаться на уведомления сервера об изменениях (GET /events)."""
+        self.stop_events()
+        self.events = EventListener(self.api)
+        self.events.signals.changed.connect(self.on_server_change)
+        self.events.signals.resync.connect(self.on_server_resync)
+        self.events.start()
+
+    def stop_events(self):
+        if self.events is not None:
+            self.events.stop()
+            self.events = None
+        self._events_timer.stop()
+        self._changed_entities.clear()
+
+    def on_server_change(self, entity_type):
+        # Серия правок (в том числе чужих) приводит к одной синхронизации каждой вкладки
+        self._changed_entities.add(entity_type)
+        self._events_timer.start()
+
+    def apply_server_changes(self):
+        changed = self._changed_entities
+        self._changed_entities = set()
+        # sync_changes сбрасывает затронутые справочники и загружает их заново в фоне
+        self.sync_changes(*changed)
+
+    def on_server_resync(self):
+        """Уведомления могли быть пропущены: синхронизировать все списки роли и справочники."""
+        self.refill_references(*self.store.invalidate())
+        for et in self.role_entities(self.current_user_role):
+            self.sync_data(et)
+
+    def load_more(self, entity_type, cursor):
+        """Догрузить следующую страницу в таблицу (вызывается моделью из fetchMore)."""
+        path = entity_path(entity_type)
+        model = self.find_table(entity_type).table_model
+        params = model.query_params
+        generation = self._refresh_generation.get(entity_type, 0)
+
+        def on_success(page):
+            if self._refresh_generation.get(entity_type) == generation:
+                model.append_rows(*page)
+
+        def on_error(e):
+            if self._refresh_generation.get(entity_type) == generation:
+                model.fetching = False
+                self.show_load_error(e)
+
+        self.run_async(
+            lambda: fetch_page(self.api, path, params, cursor),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=entity_type
+        )
+
+    def show_load_error(self, e):
+        if isinstance(e, ApiError):
+            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить данные:\n{str(e)}")
         else:
-            entities = []
+            QMessageBox.critical(self, "Ошибка", f"Не удалось подключиться к серверу:\n{str(e)}")
 
-        for et in entities:
+    @staticmethod
+    def role_entities(role):
+        """Списки, которые загружаются для роли."""
+        if role == "admin":
+            return ["region", "tariff", "user", "building", "meter", "consumption"]
+        if role == "accountant":
+            return ["tariff", "building", "meter", "consumption"]
+        if role == "tenant":
+            return ["building", "meter", "consumption"]
+        return []
+
+    def refresh_all_data(self):
+        # Запросы по всем сущностям уходят параллельно
+        for et in self.role_entities(self.current_user_role):
             self.refresh_data(et)
 
     def add_entity(self, entity_type):
@@ -926,32 +1628,42 @@ class MainWindow(QMainWindow):
             pass
 
     def edit_entity(self, entity_type, entity_id):
-        try:
-            if entity_type == "consumption":
-                url = f"{API_BASE_URL}/consumption/{entity_id}"
-            else:
-                url = f"{API_BASE_URL}/{entity_type}s/{entity_id}"
+        path = entity_path(entity_type, entity_id)
 
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if not isinstance(data, dict):
-                    raise Exception("Сервер вернул некорректные данные")
-                dialog = EditEntityDialog(self, entity_type, data, self)
-                if dialog.exec() == QDialog.DialogCode.Accepted:
-                    pass
-            else:
-                error_msg = response.json().get("error", "Неизвестная ошибка")
-                if response.status_code == 403:
-                    error_msg = "Недостаточно прав для редактирования этой записи"
-                QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные:\n{error_msg}")
-        except Exception as e:
+        def on_success(response):
+            try:
+                if response.status_code == 200:
+                    data = response.json()
+                    if not isinstance(data, dict):
+                        raise Exception("Сервер вернул некорректные данные")
+                    dialog = EditEntityDialog(self, entity_type, data, self)
+                    if dialog.exec() == QDialog.DialogCode.Accepted:
+                        pass
+                else:
+                    error_msg = api_error_message(response)
+                    if response.status_code == 403:
+                        error_msg = "Недостаточно прав для редактирования этой записи"
+                    QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные:\n{error_msg}")
+            except Exception as e:
+                on_error(e)
+
+        def on_error(e):
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить данные для редактирования:\n{str(e)}")
 
+        self.run_async(
+            lambda: self.api.get(path),
+            on_success=on_success,
+            on_error=on_error,
+            entity_type=entity_type
+        )
+
     def logout(self):
+        self.stop_events()
         self.current_user_id = None
         self.current_user_role = None
-        HEADERS.pop('X-User-ID', None)
+        self.api.clear_user()
+        self.store.invalidate()
+        self._sync_tokens.clear()
         self.user_info_label.setText("Не авторизован")
         self.show_login_dialog()
 
@@ -960,32 +1672,22 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Ошибка", "Доступ запрещён")
             return
 
-        try:
-            consumptions = requests.get(f"{API_BASE_URL}/consumption", headers=HEADERS).json()
-            meters = requests.get(f"{API_BASE_URL}/meters", headers=HEADERS).json()
-            buildings = requests.get(f"{API_BASE_URL}/buildings", headers=HEADERS).json()
-            tariffs = requests.get(f"{API_BASE_URL}/tariffs", headers=HEADERS).json()
+        def fetch_report():
+            # Соединение и суммирование выполняет сервер
+            response = self.api.get("/reports/consumption-by-building")
+            if response.status_code != 200:
+                raise ApiError(api_error_message(response))
+            return response.json()
 
-            meter_map = {m["id"]: m for m in meters}
-            building_map = {b["id"]: b for b in buildings}
-            tariff_map = {t["id"]: t for t in tariffs}
-
-            report = {}
-            total_cost = 0.0
-
-            for c in consumptions:
-                meter = meter_map.get(c["meter_id"])
-                building = building_map.get(meter["building_id"])
-                tariff = tariff_map.get(building["tariff_id"])
+        def on_error(e):
+            QMessageBox.critical(self, "Ошибка", f"Ошибка формирования отчёта:\n{str(e)}")
 
-                kwh = c["consumption_kwh"]
-                cost = kwh * tariff["rate_per_kwh"]
-                name = building["name"]
+        self.run_async(fetch_report, on_success=self.save_report, on_error=on_error, entity_type="report")
 
-                report.setdefault(name, {"kwh": 0.0, "cost": 0.0})
-                report[name]["kwh"] += kwh
-                report[name]["cost"] += cost
-                total_cost += cost
+    def save_report(self, data):
+        try:
+            report = data["items"]
+            total_cost = data["total_cost_rub"]
 
             # Диалог сохранения
             file_path, _ = QFileDialog.getSaveFileName(
@@ -1009,11 +1711,11 @@ class MainWindow(QMainWindow):
             hdr_cells[1].text = "Потребление (кВт·ч)"
             hdr_cells[2].text = "Стоимость (руб.)"
 
-            for name, data in report.items():
+            for item in report:
                 row_cells = table.add_row().cells
-                row_cells[0].text = name
-                row_cells[1].text = f"{data['kwh']:.2f}"
-                row_cells[2].text = f"{data['cost']:.2f}"
+                row_cells[0].text = item["building_name"]
+                row_cells[1].text = f"{item['total_kwh']:.2f}"
+                row_cells[2].text = f"{item['total_cost_rub']:.2f}"
 
             doc.add_paragraph(f"\nИтого: {total_cost:.2f} руб.")
 
@@ -0,0 +1,110 @@
+# app/bulk.py
+"""Разбор и проверка пакетов показаний для POST /consumption/bulk."""
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+
+def parse_kwh(value) -> float:
+    """Потребление из тела запроса: число или числовая строка, конечное.
+
+    TypeError/ValueError — для нечислового значения, nan и бесконечности.
+    """
+    consumption_kwh = float(value)
+    if not math.isfinite(consumption_kwh):
+        raise ValueError("consumption_kwh должно быть конечным числом")
+    return consumption_kwh
+
+
+def parse_rows(body: str, mimetype: str) -> Tuple[List[dict], List[dict]]:
+    """Разобрать тело запроса: JSON-массив, CSV с заголовком или NDJSON.
+
+    Возвращает (строки, ошибки). Строка NDJSON с синтаксической ошибкой не
+    прерывает разбор, а попадает в ошибки под своим номером; для неё в
+    списке строк остаётся None, чтобы нумерация совпадала с телом запроса.
+    """
+    if mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(body))), []
+
+    if mimetype == 'application/x-ndjson':
+        rows, errors = [], []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+                errors.append({"row": len(rows), "error": "Некорректная строка JSON"})
+        return rows, errors
+
+    data = json.loads(body)
+    if not isinstance(data, list):
+        raise ValueError("Ожидается JSON-массив записей")
+    return data, []
+
+
+def collect_meter_ids(rows: Iterable) -> set:
+    """Все целочисленные meter_id пакета — для одной проверки существования в БД."""
+    ids = set()
+    for row in rows:
+        if isinstance(row, dict):
+            try:
+                ids.add(int(row.get('meter_id')))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def validate_rows(rows: List, known_meter_ids: set) -> Tuple[List[dict], List[dict]]:
+    """Проверить пакет за один проход и подготовить строки для executemany.
+
+    Одинаковые даты в пакете встречаются постоянно (месячные периоды), поэтому
+    каждая строка даты разбирается один раз. Формат дат — YYYY-MM-DD, как у
+    POST /consumption. Номера строк начинаются с 1.
+    """
+    parsed_dates = {}
+
+    def parse_date(value):
+        if value not in parsed_dates:
+            try:
+                parsed_dates[value] = datetime.strptime(value, '%Y-%m-%d').date() if isinstance(value, str) else None
+            except ValueError:
+                parsed_dates[value] = None
+        return parsed_dates[value]
+
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if row is None:
+            continue  # ошибка разбора уже записана parse_rows()
+        if not isinstance(row, dict):
+            errors.append({"row": number, "error": "Запись должна быть объектом"})
+            continue
+        try:
+            meter_id = int(row.get('meter_id'))
+        except (TypeError, ValueError):
+            errors.append({"row": number, "error": "Некорректный meter_id"})
+            continue
+        if meter_id not in known_meter_ids:
+            errors.append({"row": number, "error": f"Счётчик {meter_id} не найден"})
+            continue
+        period_start = parse_date(row.get('period_start'))
+        period_end = parse_date(row.get('period_end'))
+        if period_start is None or period_end is None:
+            errors.append({"row": number, "error": "Неверный формат даты period_start или period_end"})
+            continue
+        try:
+            consumption_kwh = parse_kwh(row.get('consumption_kwh'))
+        except (TypeError, ValueError):
+            errors.append({"row": number, "error": "Некорректное значение consumption_kwh"})
+            continue
+        valid.append({
+            'meter_id': meter_id,
+            'period_start': period_start,
+            'period_end': period_end,
+            'consumption_kwh': consumption_kwh,
+        })
+    return valid, errors
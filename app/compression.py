@@ -0,0 +1,105 @@
+# app/compression.py
+"""Сжатие ответов API (gzip или brotli) по заголовку Accept-Encoding.
+
+Обычные ответы сжимаются целиком, если тело не меньше COMPRESS_MIN_SIZE
+байт. Потоковые (NDJSON) сжимаются по мере генерации: после каждого куска
+выполняется flush, так что клиент получает строки без ожидания конца выборки.
+brotli используется, только если установлен модуль brotli.
+
+Сжатое тело — другое представление ресурса, поэтому к сильному ETag
+добавляется суффикс кодирования ("users-1" -> "users-1-gzip");
+etag_variants() даёт формы, которые условный запрос может прислать.
+"""
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: без неё доступен только gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def choose_encoding():
+    """Лучшее поддерживаемое обеими сторонами кодирование или None."""
+    accepted = request.accept_encodings
+    gzip_q = accepted.quality('gzip')
+    br_q = accepted.quality('br') if brotli is not None else 0
+    if br_q and br_q >= gzip_q:
+        return 'br'
+    if gzip_q:
+        return 'gzip'
+    return None
+
+
+def encoded_etag(etag, encoding):
+    """ETag сжатого представления."""
+    return f'{etag}-{encoding}'
+
+
+def etag_variants(etag):
+    """ETag ответа в текущем запросе: несжатый и, если клиент принимает сжатие, сжатый."""
+    encoding = choose_encoding()
+    return [etag] if encoding is None else [encoded_etag(etag, encoding), etag]
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def _compress_stream(chunks, encoding, config):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESS_BR_QUALITY'])
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    for chunk in chunks:
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+def compress_response(response):
+    """after_request: сжать ответ, если клиент это поддерживает и это имеет смысл."""
+    config = current_app.config
+    if (
+        response.status_code < 200 or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(_compress(data, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(encoded_etag(etag, encoding))
+    return response
+
+
+def init_compression(app):
+    """Подключить сжатие ответов к приложению."""
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BR_QUALITY', 4)
+    app.after_request(compress_response)
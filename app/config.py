@@ -0,0 +1,126 @@
+# app/config.py
+"""Настройки приложения из переменных окружения.
+
+База данных задаётся полным URI в DATABASE_URL либо по частям: DB_DRIVER,
+DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME (по умолчанию — MySQL
+в контейнере db). Драйвер MySQL выбирается переменной DB_DRIVER:
+mysqlclient (C-расширение, самый быстрый), pymysql (чистый Python) или
+mysqlconnector; при DB_DRIVER=auto берётся первый установленный в этом
+порядке.
+
+Пул соединений SQLAlchemy настраивается DB_POOL_*: pool_size по умолчанию
+равен числу потоков воркера (GUNICORN_THREADS; под waitress wsgi.py
+подставляет WAITRESS_THREADS) — больше соединений, чем
+потоков, одновременно не понадобится, а сверх него пул не растёт
+(DB_MAX_OVERFLOW=0). Всего сервер MySQL держит workers × (pool_size +
+max_overflow) соединений, и это число должно оставаться меньше его
+max_connections (151 по умолчанию). pool_recycle — меньше wait_timeout
+сервера, чтобы он не закрывал простаивающие соединения раньше пула, а
+pool_pre_ping проверяет соединение перед выдачей и заменяет оборванное.
+
+create_app() принимает и другие URI SQLAlchemy, в том числе SQLite в файле
+или в памяти (для тестов и бенчмарков): adapt_engine_options() убирает
+из настроек пула то, что к такой базе неприменимо.
+"""
+import importlib.util
+import os
+from urllib.parse import quote_plus
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+
+# Параметры пула, неприменимые к SQLite в памяти: у StaticPool нет размера
+# и ожидания, а пересоздание единственного соединения стёрло бы базу
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle')
+
+# DB_DRIVER -> (диалект SQLAlchemy, модуль драйвера)
+MYSQL_DRIVERS = {
+    'mysqlclient': ('mysql+mysqldb', 'MySQLdb'),
+    'pymysql': ('mysql+pymysql', 'pymysql'),
+    'mysqlconnector': ('mysql+mysqlconnector', 'mysql.connector'),
+}
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _installed(module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # не установлен родительский пакет (mysql для mysql.connector)
+        return False
+
+
+def mysql_dialect(driver):
+    """Диалект SQLAlchemy для DB_DRIVER; auto — первый установленный драйвер."""
+    if driver == 'auto':
+        for dialect, module in MYSQL_DRIVERS.values():
+            if _installed(module):
+                return dialect
+        return MYSQL_DRIVERS['mysqlconnector'][0]
+    if driver not in MYSQL_DRIVERS:
+        raise ValueError(f"Неизвестный DB_DRIVER: {driver}. Допустимо: auto, {', '.join(MYSQL_DRIVERS)}")
+    return MYSQL_DRIVERS[driver][0]
+
+
+def database_uri():
+    """URI базы данных: DATABASE_URL или MySQL, собранный из DB_*."""
+    if os.environ.get('DATABASE_URL'):
+        return os.environ['DATABASE_URL']
+    return '{dialect}://{user}:{password}@{host}:{port}/{name}?charset=utf8mb4'.format(
+        dialect=mysql_dialect(os.environ.get('DB_DRIVER', 'auto')),
+        user=quote_plus(os.environ.get('DB_USER', 'user')),
+        password=quote_plus(os.environ.get('DB_PASSWORD', 'password')),
+        host=os.environ.get('DB_HOST', 'db'),
+        port=_env_int('DB_PORT', 3306),
+        name=os.environ.get('DB_NAME', 'energydb'),
+    )
+
+
+def engine_options():
+    """SQLALCHEMY_ENGINE_OPTIONS: размер пула и проверка соединений."""
+    return {
+        # Потоков воркера по умолчанию 8, как в gunicorn.conf.py
+        'pool_size': _env_int('DB_POOL_SIZE', _env_int('GUNICORN_THREADS', 8)),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 0),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        # Типичный wait_timeout в хостинге MySQL — 300 с; соединения старше
+        # pool_recycle секунд пересоздаются до того, как сервер их закроет
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 280),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+
+
+def adapt_engine_options(uri, options):
+    """SQLALCHEMY_ENGINE_OPTIONS, применимые к базе uri.
+
+    SQLite в памяти живёт, пока открыто соединение, поэтому все потоки
+    работают через одно соединение (StaticPool). SQLite в файле и серверные
+    СУБД используют QueuePool с настройками как есть.
+    """
+    url = make_url(uri)
+    options = dict(options)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+        options['poolclass'] = StaticPool
+        options['connect_args'] = {**options.get('connect_args', {}), 'check_same_thread': False}
+    return options
+
+
+def env_config():
+    """Настройки для app.config, заданные окружением."""
+    return {
+        'SQLALCHEMY_DATABASE_URI': database_uri(),
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'EVENTS_REDIS_URL': os.environ.get('EVENTS_REDIS_URL') or None,
+    }
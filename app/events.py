@@ -0,0 +1,234 @@
+# app/events.py
+"""Уведомления клиентов об изменениях сущностей (GET /events, Server-Sent Events).
+
+После успешного commit сессии публикуется по одному событию на каждую
+изменённую сущность: {"entity": "meter"}. Изменения собираются из сессии
+(новые, изменённые и удалённые объекты, включая каскадно удалённые) и из
+ORM-запросов INSERT/UPDATE/DELETE вроде пакетной вставки показаний. По
+событию клиент запрашивает /<коллекция>/changes только для задетых вкладок.
+
+Подписчикам процесса события раздаются через очереди в памяти, а
+публикация идёт через сменный бэкенд: LocalBackend доставляет события
+только в своём процессе, RedisBackend — через канал Redis во все воркеры
+(нужны модуль redis и EVENTS_REDIS_URL).
+"""
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from sync import TRACKED
+
+try:
+    import redis
+except ImportError:  # необязательная зависимость: без неё события не покидают процесс
+    redis = None
+
+# Событие «уведомления могли быть потеряны»: клиенту нужно синхронизировать все списки
+RESET = {'reset': True}
+
+_PENDING_KEY = 'pending_events'
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Очередь событий одного подключения к /events."""
+
+    def __init__(self, maxsize: int):
+        self._queue = queue.Queue(maxsize)
+        self._overflowed = False
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Клиент не успевает читать: вместо отброшенных событий он получит RESET
+            self._overflowed = True
+
+    def get(self, timeout: float):
+        """Следующее событие или None, если за timeout секунд событий не было."""
+        if self._overflowed:
+            self._overflowed = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return RESET
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocalBackend:
+    """Публикация в пределах процесса (один воркер или разработка)."""
+    name = 'local'
+
+    def start(self, bus):
+        pass
+
+    def publish(self, bus, item):
+        bus.dispatch(item)
+
+
+class RedisBackend:
+    """Публикация через канал Redis: событие получают подписчики всех воркеров.
+
+    Слушатель канала — фоновый поток, который запускается при первой
+    подписке (после fork воркера, а не в мастер-процессе). Если соединение
+    с Redis оборвалось, поток переподключается с нарастающей паузой
+    (от reconnect_delay до max_reconnect_delay секунд), а после повторной
+    подписки рассылает RESET: события за время разрыва потеряны.
+    """
+    name = 'redis'
+    reconnect_delay = 0.5
+    max_reconnect_delay = 30.0
+
+    def __init__(self, url: str, channel: str):
+        if redis is None:
+            raise RuntimeError('Для EVENTS_REDIS_URL нужен модуль redis (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def start(self, bus):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, args=(bus,), name='events-redis', daemon=True
+                )
+                self._listener.start()
+
+    def publish(self, bus, item):
+        self.client.publish(self.channel, json.dumps(item))
+
+    def _listen(self, bus):
+        delay, reconnecting = self.reconnect_delay, False
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                if reconnecting:
+                    bus.dispatch(RESET)
+                    reconnecting, delay = False, self.reconnect_delay
+                for message in pubsub.listen():
+                    try:
+                        bus.dispatch(json.loads(message['data']))
+                    except (TypeError, ValueError):
+                        logger.warning('Некорректное сообщение в канале %s: %r', self.channel, message)
+            except (redis.RedisError, OSError):
+                logger.warning('Соединение с Redis потеряно, повтор через %.1f с', delay, exc_info=True)
+            finally:
+                pubsub.close()
+            reconnecting = True
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+class EventBus:
+    """Раздача событий подписчикам процесса; публикация — через бэкенд."""
+
+    def __init__(self, backend=None, queue_size: int = 100):
+        self.backend = backend or LocalBackend()
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, item):
+        self.backend.publish(self, item)
+
+    def dispatch(self, item):
+        """Положить событие в очереди всех подписчиков процесса (вызывает бэкенд)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(item)
+
+    def subscribe(self) -> Subscription:
+        self.backend.start(self)
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'backend': self.backend.name, 'subscribers': len(self._subscribers)}
+
+
+def format_sse(item) -> str:
+    """Событие в формате text/event-stream: change или reset."""
+    name = 'reset' if item.get('reset') else 'change'
+    return f'event: {name}\ndata: {json.dumps(item)}\n\n'
+
+
+# ========================
+# СБОР ИЗМЕНЕНИЙ ИЗ СЕССИИ
+# ========================
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+def _collect_flushed(session, flush_context):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        tracked = TRACKED.get(type(obj))
+        if tracked and (obj not in session.dirty or session.is_modified(obj)):
+            _pending(session).add(tracked[0])
+
+
+def _collect_executed(orm_execute_state):
+    state = orm_execute_state
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        tracked = TRACKED.get(state.bind_mapper.class_)
+        if tracked:
+            _pending(state.session).add(tracked[0])
+
+
+def _publish_pending(session):
+    entities = session.info.pop(_PENDING_KEY, None)
+    if not entities or not has_app_context():
+        return
+    bus = current_app.extensions.get('events')
+    if bus is None:
+        return
+    for entity in sorted(entities):
+        try:
+            bus.publish({'entity': entity})
+        except Exception:
+            # Данные уже зафиксированы: сбой уведомлений не должен превращаться в ошибку запроса
+            current_app.logger.exception('Не удалось опубликовать событие об изменении %s', entity)
+
+
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, 'after_flush', _collect_flushed)
+event.listen(Session, 'do_orm_execute', _collect_executed)
+event.listen(Session, 'after_commit', _publish_pending)
+event.listen(Session, 'after_rollback', _discard_pending)
+
+
+def init_events(app) -> EventBus:
+    """Создать шину событий приложения (app.extensions['events'])."""
+    app.config.setdefault('EVENTS_REDIS_URL', None)
+    app.config.setdefault('EVENTS_REDIS_CHANNEL', 'energy-events')
+    app.config.setdefault('EVENTS_QUEUE_SIZE', 100)
+    app.config.setdefault('EVENTS_HEARTBEAT', 15)
+    if app.config['EVENTS_REDIS_URL']:
+        backend = RedisBackend(app.config['EVENTS_REDIS_URL'], app.config['EVENTS_REDIS_CHANNEL'])
+    else:
+        backend = LocalBackend()
+    bus = EventBus(backend, queue_size=app.config['EVENTS_QUEUE_SIZE'])
+    app.extensions['events'] = bus
+    return bus
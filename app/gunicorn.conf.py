@@ -0,0 +1,61 @@
+# app/gunicorn.conf.py
+"""Настройки gunicorn для продакшен-запуска API.
+
+Запуск из каталога app:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Каждый параметр переопределяется переменной окружения GUNICORN_*.
+Воркеры — отдельные процессы: разбор запросов и кодирование JSON упираются
+в GIL, поэтому пропускная способность растёт с числом ядер только за счёт
+процессов. Потоки внутри воркера (gthread) перекрывают ожидание БД и
+обслуживают подписки GET /events: каждая занимает поток на всё время
+подключения, так что threads должно быть больше числа одновременно
+открытых клиентов на воркер. При нескольких воркерах события между ними
+доставляет только Redis-бэкенд (EVENTS_REDIS_URL, см. events.py).
+
+Каждый воркер держит собственный пул соединений БД, поэтому число
+воркеров по умолчанию ограничено бюджетом соединений DB_CONNECTION_BUDGET.
+"""
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import engine_options
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Потоки gthread перекрывают ожидание БД, поэтому процессов нужно не 2 на
+# ядро, как синхронным воркерам, а ядро + 1. Но не больше, чем помещается
+# в бюджет соединений: max_connections MySQL по умолчанию 151, запас
+# остаётся CLI-командам, DBeaver и мониторингу
+_pool = engine_options()
+_connections_per_worker = _pool['pool_size'] + _pool['max_overflow']
+_budget_workers = _env_int('DB_CONNECTION_BUDGET', 120) // max(_connections_per_worker, 1)
+workers = _env_int('GUNICORN_WORKERS', max(1, min(multiprocessing.cpu_count() + 1, _budget_workers)))
+worker_class = 'gthread'
+threads = _env_int('GUNICORN_THREADS', 8)
+
+# Keep-alive клиента (ApiClient держит пул соединений), секунд
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+# Воркер, не отвечающий мастеру дольше timeout секунд, перезапускается
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+
+# Плановый перезапуск воркеров ограничивает рост памяти; jitter разносит перезапуски
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 5000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 500)
+
+# Приложение создаётся в каждом воркере после fork: пул соединений БД
+# и фоновые потоки (слушатель Redis) не наследуются от мастера
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,67 @@
+# app/json_provider.py
+"""JSON-провайдер Flask: orjson, если он установлен, иначе стандартный json.
+
+Оба варианта кодируют date/datetime в ISO 8601 (DefaultJSONProvider отдаёт
+их в формате HTTP-даты), поэтому проекции и to_dict() возвращают даты как
+есть, без вызова isoformat() для каждой строки. Кириллица не экранируется
+в \\uXXXX, ключи не сортируются: порядок полей задают проекции.
+"""
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость: без неё работает стандартный json
+    orjson = None
+
+
+def _default(obj):
+    """Типы, которые не кодируются напрямую (datetime — подкласс date)."""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Стандартный json с датами в ISO 8601."""
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson для dumps/loads и ответов jsonify().
+
+    Вызовы с аргументами json.dumps/json.loads (indent, cls и т.п.) уходят
+    в стандартную реализацию.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._options() | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option), mimetype=self.mimetype
+        )
+
+    def _options(self):
+        return orjson.OPT_SORT_KEYS if self.sort_keys else 0
+
+
+# Провайдер, который регистрирует приложение
+JSON_PROVIDER = OrjsonProvider if orjson is not None else StdlibJSONProvider
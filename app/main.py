@@ -1,22 +1,320 @@
 # app/main.py
-from flask import Flask, request, jsonify
-from models import db, Role, User, Region, Tariff, Building, Meter, ConsumptionRecord
-from datetime import datetime
-from sqlalchemy.exc import SQLAlchemyError
+from flask import Flask, Blueprint, Response, current_app, request, jsonify, stream_with_context, abort
+from models import (
+    db, utcnow, ensure_table_versions,
+    Role, User, Region, Tariff, Building, Meter, ConsumptionRecord, ConsumptionRollup, TableVersion
+)
+from user_cache import CachedUser, UserCache
+from bulk import parse_rows, parse_kwh, collect_meter_ids, validate_rows
+import rollups
+import sync
+import events
+from json_provider import JSON_PROVIDER
+from compression import init_compression, etag_variants
+from config import env_config, adapt_engine_options
+from seed import seed_demo
+from serializers import (
+    ROLE_PROJECTION, USER_PROJECTION, REGION_PROJECTION, TARIFF_PROJECTION,
+    BUILDING_PROJECTION, METER_PROJECTION, CONSUMPTION_PROJECTION, TARIFF_IN_FORCE
+)
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, func, insert, update, inspect, text, and_, or_, case
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload
 from functools import wraps
+import click
+from werkzeug.local import LocalProxy
+import base64
+import hashlib
+import json
 
 # === Добавлено для поддержки CORS ===
 from flask_cors import CORS
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql+mysqlconnector://user:password@db:3306/energydb'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Маршруты и CLI-команды API; приложение собирает create_app()
+api = Blueprint('api', __name__, cli_group=None)
 
-# === Инициализация CORS ===
-# === Инициализация CORS ===
-CORS(app, resources={r"/*": {"origins": "http://localhost:8080"}}, supports_credentials=True)
+# Кэш пользователей текущего приложения (создаёт create_app)
+user_cache = LocalProxy(lambda: current_app.extensions['user_cache'])
 
-db.init_app(app)
+# Жадная загрузка связей, которые читает to_dict() (ответы по одному объекту);
+# списки сериализуются колоночными проекциями из serializers.py
+BUILDING_LOAD_OPTIONS = (
+    joinedload(Building.region),
+    joinedload(Building.tariff),
+    joinedload(Building.owner),
+)
+METER_LOAD_OPTIONS = (
+    joinedload(Meter.building),
+)
+CONSUMPTION_LOAD_OPTIONS = (
+    joinedload(ConsumptionRecord.meter).joinedload(Meter.building).joinedload(Building.tariff),
+)
+
+# Размер страницы для списков с keyset-пагинацией
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+# Размер пачки строк, которую потоковая выдача забирает из курсора БД
+STREAM_BATCH_SIZE = 1000
+
+
+def parse_date_arg(name):
+    """Разобрать необязательный параметр запроса в формате YYYY-MM-DD."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Неверный формат даты {name}")
+
+
+def wants_stream():
+    """Клиент запросил потоковую выдачу (Accept: application/x-ndjson или ?stream=1)."""
+    return request.args.get('stream') == '1' or request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+def ndjson_response(stmt, projection):
+    """Отдать результат выборки потоково, по одному JSON-объекту на строку.
+
+    Строки читаются серверным курсором пачками по STREAM_BATCH_SIZE, поэтому
+    память не зависит от размера выборки, а первый байт уходит сразу.
+    """
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        for batch in result.partitions():
+            yield ''.join(current_app.json.dumps(item) + '\n' for item in projection.serialize(batch))
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# ========================
+# ВЫБОРОЧНЫЕ ПОЛЯ (?fields=)
+# ========================
+def parse_fields(projection):
+    """Разобрать ?fields=a,b,c для сущности с проекцией projection.
+
+    Возвращает список полей в порядке запроса или None (все поля). На
+    неизвестное поле сразу отвечает 400 со списком допустимых.
+    """
+    value = request.args.get('fields')
+    if not value:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in projection.columns]
+    if not fields:
+        abort(400, description="Пустой список полей fields")
+    if unknown:
+        abort(400, description=f"Неизвестные поля: {', '.join(unknown)}. Допустимо: {', '.join(projection.keys)}")
+    return fields
+
+
+def pick_fields(data, fields):
+    """Оставить в словаре to_dict() только запрошенные поля."""
+    return data if fields is None else {key: data[key] for key in fields}
+
+
+# ========================
+# СОРТИРОВКА И ПОИСК
+# ========================
+# Разрешённые значения ?sort= для списков: ключ -> колонка. Все колонки
+# покрыты индексами (первичный ключ, unique или ix_* в models.py).
+BUILDING_SORTS = {
+    'id': Building.id,
+    'name': Building.name,
+    'address': Building.address,
+}
+METER_SORTS = {
+    'id': Meter.id,
+    'serial_number': Meter.serial_number,
+}
+CONSUMPTION_SORTS = {
+    'id': ConsumptionRecord.id,
+    'period_start': ConsumptionRecord.period_start,
+}
+
+
+def parse_sort(allowed):
+    """Разобрать ?sort=<поле> или ?sort=-<поле> (по убыванию).
+
+    Возвращает (ключ, колонка, по_убыванию); по умолчанию сортировка по id.
+    """
+    value = request.args.get('sort') or 'id'
+    descending = value.startswith('-')
+    key = value.lstrip('-')
+    if key not in allowed:
+        raise ValueError(f"Недопустимое поле сортировки: {key}. Допустимо: {', '.join(allowed)}")
+    return key, allowed[key], descending
+
+
+def order_by_sort(stmt, column, descending, id_column):
+    """Упорядочить по колонке сортировки, id — для однозначного порядка."""
+    if descending:
+        return stmt.order_by(column.desc(), id_column.desc())
+    return stmt.order_by(column, id_column)
+
+
+def prefix_search(stmt, *columns):
+    """Условие ?q=: значение — префикс хотя бы одной из колонок.
+
+    LIKE 'abc%' без ведущего шаблона может использовать индекс колонки;
+    символы % и _ в запросе экранируются и ищутся буквально.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return stmt
+    pattern = q.replace('/', '//').replace('%', '/%').replace('_', '/_') + '%'
+    return stmt.where(or_(*[column.like(pattern, escape='/') for column in columns]))
+
+
+def encode_cursor(sort_key, value, row_id):
+    """Непрозрачный курсор страницы: поле сортировки, его значение и id последней строки."""
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([sort_key, value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _is_int(value):
+    # bool — подкласс int, но в курсоре означает подделку
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor, sort_key, column):
+    """Разобрать курсор, выданный encode_cursor() для той же сортировки."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, value, row_id = json.loads(raw)
+        if key != sort_key or not _is_int(row_id):
+            raise ValueError
+        if isinstance(column.type, db.Date):
+            value = date.fromisoformat(value)
+        elif isinstance(column.type, db.Integer) and not _is_int(value):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Некорректный cursor")
+    return value, row_id
+
+
+def after_cursor(stmt, column, descending, id_column, value, row_id):
+    """Keyset-условие: строки строго после (value, row_id) в порядке сортировки."""
+    if descending:
+        return stmt.where(or_(column < value, and_(column == value, id_column < row_id)))
+    return stmt.where(or_(column > value, and_(column == value, id_column > row_id)))
+
+
+# ========================
+# ВЕРСИИ СПРАВОЧНИКОВ И ETAG
+# ========================
+def bump_version(table_name):
+    """Увеличить версию таблицы в текущей транзакции (вызывать до commit).
+
+    Строки table_versions создают init-db и migrate. Если БД их не прошла,
+    строку создаёт первый писатель; параллельный получит IntegrityError в
+    точке сохранения и просто увеличит версию.
+    """
+    increment = (
+        update(TableVersion)
+        .where(TableVersion.table_name == table_name)
+        .values(version=TableVersion.version + 1)
+    )
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(TableVersion(table_name=table_name, version=1))
+    except IntegrityError:
+        db.session.execute(increment)
+
+
+def table_etag(table_name):
+    """Сильный ETag списка: версия таблицы плюс отпечаток строки запроса."""
+    version = db.session.scalar(
+        select(TableVersion.version).where(TableVersion.table_name == table_name)
+    ) or 0
+    etag = f'{table_name}-{version}'
+    if request.query_string:
+        etag += '-' + hashlib.sha1(request.query_string).hexdigest()[:12]
+    return etag
+
+
+def conditional_response(etag, make_response):
+    """Ответить 304, если у клиента актуальная версия, иначе построить тело.
+
+    Клиент мог сохранить как несжатое, так и сжатое представление: 304
+    повторяет ETag того, что у него есть (суффикс кодирования ставит compression.py).
+    """
+    matched = next((variant for variant in etag_variants(etag) if request.if_none_match.contains(variant)), None)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+        response.vary.add('Accept-Encoding')
+    else:
+        response = make_response()
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# ========================
+# ДАННЫЕ АРЕНДАТОРА
+# ========================
+def join_meter_owner(stmt):
+    """Присоединить buildings к выборке по meters."""
+    return stmt.join(Building, Building.id == Meter.building_id)
+
+
+def join_consumption_owner(stmt):
+    """Присоединить цепочку meters → buildings к выборке по consumption_records."""
+    return join_meter_owner(stmt.join(Meter, Meter.id == ConsumptionRecord.meter_id))
+
+
+def join_tariff_in_force(stmt):
+    """Присоединить тариф здания, действующий в периоде показания (внешнее соединение).
+
+    Выборка должна содержать consumption_records и buildings; показания вне
+    срока тарифа остаются в ней с tariffs.* = NULL.
+    """
+    return stmt.outerjoin(Tariff, TARIFF_IN_FORCE)
+
+
+def scope_to_tenant(stmt, current_user):
+    """Арендатору оставить только строки его зданий (buildings.user_id).
+
+    Выборка должна уже содержать buildings: так устроены проекции счётчиков
+    и показаний, а также выборки после join_meter_owner()/join_consumption_owner().
+    Для остальных ролей выборка не меняется.
+    """
+    if current_user.role_name == 'tenant':
+        return stmt.where(Building.user_id == current_user.id)
+    return stmt
+
+
+def scope_records_to_tenant(stmt, current_user):
+    """scope_to_tenant() для постраничных выборок по consumption_records.
+
+    Условие meter_id IN (счётчики арендатора) даёт СУБД начать с его зданий
+    по ix_buildings_user_id → ix_meters_building_id →
+    ix_consumption_records_meter_period, а не просматривать всю таблицу
+    в порядке сортировки, пока не наберётся страница.
+    """
+    if current_user.role_name == 'tenant':
+        tenant_meters = join_meter_owner(select(Meter.id)).where(Building.user_id == current_user.id)
+        stmt = stmt.where(ConsumptionRecord.meter_id.in_(tenant_meters))
+    return scope_to_tenant(stmt, current_user)
+
+
+def visible_to(current_user, stmt) -> bool:
+    """EXISTS-проверка, что строки выборки доступны текущему пользователю.
+
+    Остальным ролям доступно всё: запрос к БД выполняется только для арендатора.
+    """
+    if current_user.role_name != 'tenant':
+        return True
+    return bool(db.session.scalar(select(scope_to_tenant(stmt, current_user).exists())))
 
 
 # ========================
@@ -32,11 +330,15 @@ def require_role(*allowed_roles):
             if not user_id or not user_id.isdigit():
                 return jsonify({"error": "Требуется заголовок X-User-ID (целое число)"}), 401
 
-            user = User.query.get(int(user_id))
-            if not user:
-                return jsonify({"error": "Пользователь не найден"}), 404
+            user = user_cache.get(int(user_id))
+            if user is None:
+                db_user = User.query.get(int(user_id))
+                if not db_user:
+                    return jsonify({"error": "Пользователь не найден"}), 404
+                user = CachedUser(id=db_user.id, role_name=db_user.role.name)
+                user_cache.put(user)
 
-            if user.role.name not in allowed_roles:
+            if user.role_name not in allowed_roles:
                 return jsonify({"error": "Недостаточно прав"}), 403
 
             return f(current_user=user, **kwargs)
@@ -49,7 +351,7 @@ def require_role(*allowed_roles):
 # ========================
 # АУТЕНТИФИКАЦИЯ
 # ========================
-@app.route('/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     """Аутентификация пользователя."""
     data = request.get_json()
@@ -80,41 +382,114 @@ def login():
 # ========================
 # CLI: ИНИЦИАЛИЗАЦИЯ БД
 # ========================
-@app.cli.command("init-db")
+@api.cli.command("init-db")
 def init_db_command():
-    """Создать таблицы и стандартные роли."""
-    with app.app_context():
-        db.create_all()
-        # Создаём стандартные роли, если их нет
-        if not Role.query.filter_by(name='tenant').first():
-            db.session.add_all([
-                Role(name='tenant'),
-                Role(name='accountant'),
-                Role(name='admin')
-            ])
-            db.session.commit()
+    """Создать таблицы, стандартные роли и счётчики версий справочников."""
+    db.create_all()
+    # Создаём стандартные роли, если их нет
+    if not Role.query.filter_by(name='tenant').first():
+        db.session.add_all([
+            Role(name='tenant'),
+            Role(name='accountant'),
+            Role(name='admin')
+        ])
+    ensure_table_versions()
+    db.session.commit()
     print("✅ Таблицы и роли созданы.")
 
 
+@api.cli.command("migrate")
+def migrate_command():
+    """Досоздать недостающие таблицы, колонки, индексы и счётчики версий в существующей БД.
+
+    Новые колонки добавляются через ALTER TABLE ... ADD COLUMN, поэтому
+    они должны допускать NULL или иметь значение по умолчанию на сервере.
+    Только что созданная таблица месячных итогов сразу заполняется по
+    имеющимся показаниям (как rebuild-rollups).
+    """
+    had_rollups = inspect(db.engine).has_table(ConsumptionRollup.__tablename__)
+    db.create_all()
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    added, created = [], []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+                    added.append(f"{table.name}.{column.name}")
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    versions = ensure_table_versions()
+    db.session.commit()
+    # Без пересчёта /reports/monthly пуст, а приращения копились бы в неполных корзинах
+    buckets = None if had_rollups else rollups.rebuild_all()
+    if added:
+        print("✅ Добавлены колонки: " + ", ".join(added))
+    if created:
+        print("✅ Созданы индексы: " + ", ".join(created))
+    if versions:
+        print("✅ Созданы счётчики версий: " + ", ".join(versions))
+    if buckets is not None:
+        print(f"✅ Создана таблица consumption_rollups, итоги пересчитаны: {buckets} корзин.")
+    if not added and not created and not versions and buckets is None:
+        print("✅ Схема уже актуальна.")
+
+
+@api.cli.command("purge-tombstones")
+def purge_tombstones_command():
+    """Удалить из журнала удалений записи старше SYNC_RETENTION_DAYS."""
+    removed = sync.purge_tombstones(utcnow() - timedelta(days=current_app.config['SYNC_RETENTION_DAYS']))
+    print(f"✅ Удалено записей журнала: {removed}.")
+
+
+@api.cli.command("seed-demo")
+@click.option("--buildings", default=20, show_default=True, help="Число зданий.")
+@click.option("--meters", "meters_per_building", default=2, show_default=True, help="Счётчиков на здание.")
+@click.option("--months", default=12, show_default=True, help="Месяцев показаний на счётчик.")
+@click.option("--tenants", default=3, show_default=True, help="Число арендаторов.")
+@click.option("--seed", default=0, show_default=True, help="Зерно генератора данных.")
+def seed_demo_command(buildings, meters_per_building, months, tenants, seed):
+    """Заполнить пустую БД демонстрационными данными."""
+    counts = seed_demo(buildings=buildings, meters_per_building=meters_per_building,
+                       months=months, tenants=tenants, seed=seed)
+    print("✅ Созданы записи: " + ", ".join(f"{name} — {count}" for name, count in counts.items()))
+
+
+@api.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Пересчитать месячные итоги потребления по всем показаниям."""
+    buckets = rollups.rebuild_all()
+    print(f"✅ Итоги пересчитаны: {buckets} корзин.")
+
+
 # ========================
 # РОЛИ
 # ========================
-@app.route('/roles', methods=['GET'])
+@api.route('/roles', methods=['GET'])
 @require_role('admin')
 def get_roles(current_user):
     """Получить все роли."""
-    return jsonify([r.to_dict() for r in Role.query.all()])
+    projection = ROLE_PROJECTION.only(parse_fields(ROLE_PROJECTION))
+    return jsonify(list(projection.serialize(db.session.execute(projection.select()))))
 
 
-@app.route('/roles/<int:id>', methods=['GET'])
+@api.route('/roles/<int:id>', methods=['GET'])
 @require_role('admin')
 def get_role_by_id(current_user, id):
     """Получить одну роль по ID."""
+    fields = parse_fields(ROLE_PROJECTION)
     role = Role.query.get_or_404(id)
-    return jsonify(role.to_dict())
+    return jsonify(pick_fields(role.to_dict(), fields))
 
 
-@app.route('/roles', methods=['POST'])
+@api.route('/roles', methods=['POST'])
 @require_role('admin')
 def create_role(current_user):
     """Создать новую роль."""
@@ -122,28 +497,34 @@ def create_role(current_user):
     r = Role(name=data['name'])
     db.session.add(r)
     db.session.commit()
+    user_cache.clear()
     return jsonify(r.to_dict()), 201
 
 
 # ========================
 # ПОЛЬЗОВАТЕЛИ
 # ========================
-@app.route('/users', methods=['GET'])
+@api.route('/users', methods=['GET'])
 @require_role('admin')
 def get_users(current_user):
-    """Получить всех пользователей."""
-    return jsonify([u.to_dict() for u in User.query.all()])
+    """Получить всех пользователей (поддерживает If-None-Match)."""
+    projection = USER_PROJECTION.only(parse_fields(USER_PROJECTION))
+    return conditional_response(
+        table_etag('users'),
+        lambda: jsonify(list(projection.serialize(db.session.execute(projection.select()))))
+    )
 
 
-@app.route('/users/<int:id>', methods=['GET'])
+@api.route('/users/<int:id>', methods=['GET'])
 @require_role('admin')
 def get_user_by_id(current_user, id):
     """Получить одного пользователя по ID."""
+    fields = parse_fields(USER_PROJECTION)
     user = User.query.get_or_404(id)
-    return jsonify(user.to_dict())
+    return jsonify(pick_fields(user.to_dict(), fields))
 
 
-@app.route('/users', methods=['POST'])
+@api.route('/users', methods=['POST'])
 @require_role('admin')
 def create_user(current_user):
     """Создать нового пользователя."""
@@ -154,11 +535,12 @@ def create_user(current_user):
         role_id=data['role_id']
     )
     db.session.add(u)
+    bump_version('users')
     db.session.commit()
     return jsonify(u.to_dict()), 201
 
 
-@app.route('/users/<int:id>', methods=['PUT'])
+@api.route('/users/<int:id>', methods=['PUT'])
 @require_role('admin')
 def update_user(current_user, id):
     """Обновить пользователя."""
@@ -174,11 +556,13 @@ def update_user(current_user, id):
     if 'role_id' in data:
         user.role_id = data['role_id']
 
+    bump_version('users')
     db.session.commit()
+    user_cache.invalidate(user.id)
     return jsonify(user.to_dict())
 
 
-@app.route('/users/<int:id>', methods=['DELETE'])
+@api.route('/users/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_user(current_user, id):
     """Удалить пользователя."""
@@ -186,40 +570,48 @@ def delete_user(current_user, id):
         return jsonify({"error": "Нельзя удалить самого себя"}), 400
     user = User.query.get_or_404(id)
     db.session.delete(user)
+    bump_version('users')
     db.session.commit()
+    user_cache.invalidate(id)
     return '', 204
 
 
 # ========================
 # REGIONS
 # ========================
-@app.route('/regions', methods=['GET'])
+@api.route('/regions', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_regions(current_user):
-    """Получить все регионы."""
-    return jsonify([r.to_dict() for r in Region.query.all()])
+    """Получить все регионы (поддерживает If-None-Match)."""
+    projection = REGION_PROJECTION.only(parse_fields(REGION_PROJECTION))
+    return conditional_response(
+        table_etag('regions'),
+        lambda: jsonify(list(projection.serialize(db.session.execute(projection.select()))))
+    )
 
 
-@app.route('/regions/<int:id>', methods=['GET'])
+@api.route('/regions/<int:id>', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_region_by_id(current_user, id):
     """Получить один регион по ID."""
+    fields = parse_fields(REGION_PROJECTION)
     region = Region.query.get_or_404(id)
-    return jsonify(region.to_dict())
+    return jsonify(pick_fields(region.to_dict(), fields))
 
 
-@app.route('/regions', methods=['POST'])
+@api.route('/regions', methods=['POST'])
 @require_role('admin')
 def create_region(current_user):
     """Создать новый регион."""
     data = request.get_json()
     r = Region(name=data['name'], timezone=data['timezone'])
     db.session.add(r)
+    bump_version('regions')
     db.session.commit()
     return jsonify(r.to_dict()), 201
 
 
-@app.route('/regions/<int:id>', methods=['PUT'])
+@api.route('/regions/<int:id>', methods=['PUT'])
 @require_role('admin')
 def update_region(current_user, id):
     """Обновить регион."""
@@ -227,16 +619,18 @@ def update_region(current_user, id):
     data = request.get_json()
     region.name = data.get('name', region.name)
     region.timezone = data.get('timezone', region.timezone)
+    bump_version('regions')
     db.session.commit()
     return jsonify(region.to_dict())
 
 
-@app.route('/regions/<int:id>', methods=['DELETE'])
+@api.route('/regions/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_region(current_user, id):
     """Удалить регион."""
     region = Region.query.get_or_404(id)
     db.session.delete(region)
+    bump_version('regions')
     db.session.commit()
     return '', 204
 
@@ -244,22 +638,27 @@ def delete_region(current_user, id):
 # ========================
 # TARIFFS
 # ========================
-@app.route('/tariffs', methods=['GET'])
+@api.route('/tariffs', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_tariffs(current_user):
-    """Получить все тарифы."""
-    return jsonify([t.to_dict() for t in Tariff.query.all()])
+    """Получить все тарифы (поддерживает If-None-Match)."""
+    projection = TARIFF_PROJECTION.only(parse_fields(TARIFF_PROJECTION))
+    return conditional_response(
+        table_etag('tariffs'),
+        lambda: jsonify(list(projection.serialize(db.session.execute(projection.select()))))
+    )
 
 
-@app.route('/tariffs/<int:id>', methods=['GET'])
+@api.route('/tariffs/<int:id>', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_tariff_by_id(current_user, id):
     """Получить один тариф по ID."""
+    fields = parse_fields(TARIFF_PROJECTION)
     tariff = Tariff.query.get_or_404(id)
-    return jsonify(tariff.to_dict())
+    return jsonify(pick_fields(tariff.to_dict(), fields))
 
 
-@app.route('/tariffs', methods=['POST'])
+@api.route('/tariffs', methods=['POST'])
 @require_role('accountant', 'admin')
 def create_tariff(current_user):
     """Создать новый тариф."""
@@ -283,11 +682,12 @@ def create_tariff(current_user):
         valid_to=valid_to
     )
     db.session.add(t)
+    bump_version('tariffs')
     db.session.commit()
     return jsonify(t.to_dict()), 201
 
 
-@app.route('/tariffs/<int:id>', methods=['PUT'])
+@api.route('/tariffs/<int:id>', methods=['PUT'])
 @require_role('accountant', 'admin')
 def update_tariff(current_user, id):
     """Обновить тариф."""
@@ -312,16 +712,18 @@ def update_tariff(current_user, id):
         else:
             tariff.valid_to = None
 
+    bump_version('tariffs')
     db.session.commit()
     return jsonify(tariff.to_dict())
 
 
-@app.route('/tariffs/<int:id>', methods=['DELETE'])
+@api.route('/tariffs/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_tariff(current_user, id):
     """Удалить тариф."""
     tariff = Tariff.query.get_or_404(id)
     db.session.delete(tariff)
+    bump_version('tariffs')
     db.session.commit()
     return '', 204
 
@@ -329,31 +731,43 @@ def delete_tariff(current_user, id):
 # ========================
 # BUILDINGS
 # ========================
-@app.route('/buildings', methods=['GET'])
+@api.route('/buildings', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_buildings(current_user):
-    """Получить все здания."""
-    if current_user.role.name == 'tenant':
-        buildings = Building.query.filter_by(user_id=current_user.id).all()
-    else:
-        buildings = Building.query.all()
-    return jsonify([b.to_dict() for b in buildings])
+    """Получить все здания.
 
-
-@app.route('/buildings/<int:id>', methods=['GET'])
+    Параметры запроса: q — префикс названия или адреса; sort — id, name,
+    address (с «-» в начале — по убыванию).
+    """
+    try:
+        _, sort_column, descending = parse_sort(BUILDING_SORTS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    projection = BUILDING_PROJECTION.only(parse_fields(BUILDING_PROJECTION))
+    stmt = scope_to_tenant(projection.select(), current_user)
+    stmt = prefix_search(stmt, Building.name, Building.address)
+    stmt = order_by_sort(stmt, sort_column, descending, Building.id)
+    if wants_stream():
+        return ndjson_response(stmt, projection)
+    rows = db.session.execute(stmt)
+    return jsonify(list(projection.serialize(rows)))
+
+
+@api.route('/buildings/<int:id>', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_building_by_id(current_user, id):
     """Получить одно здание по ID."""
-    building = Building.query.get_or_404(id)
+    fields = parse_fields(BUILDING_PROJECTION)
+    building = Building.query.options(*BUILDING_LOAD_OPTIONS).get_or_404(id)
 
     # Проверка прав доступа для tenant
-    if current_user.role.name == 'tenant' and building.user_id != current_user.id:
+    if current_user.role_name == 'tenant' and building.user_id != current_user.id:
         return jsonify({"error": "Доступ запрещён"}), 403
 
-    return jsonify(building.to_dict())
+    return jsonify(pick_fields(building.to_dict(), fields))
 
 
-@app.route('/buildings', methods=['POST'])
+@api.route('/buildings', methods=['POST'])
 @require_role('admin')
 def create_building(current_user):
     """Создать новое здание."""
@@ -371,7 +785,7 @@ def create_building(current_user):
     return jsonify(b.to_dict()), 201
 
 
-@app.route('/buildings/<int:id>', methods=['PUT'])
+@api.route('/buildings/<int:id>', methods=['PUT'])
 @require_role('admin')
 def update_building(current_user, id):
     """Обновить здание."""
@@ -387,7 +801,7 @@ def update_building(current_user, id):
     return jsonify(building.to_dict())
 
 
-@app.route('/buildings/<int:id>', methods=['DELETE'])
+@api.route('/buildings/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_building(current_user, id):
     """Удалить здание."""
@@ -400,34 +814,43 @@ def delete_building(current_user, id):
 # ========================
 # METERS
 # ========================
-@app.route('/meters', methods=['GET'])
+@api.route('/meters', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_meters(current_user):
-    """Получить все счётчики."""
-    if current_user.role.name == 'tenant':
-        user_building_ids = [b.id for b in Building.query.filter_by(user_id=current_user.id).all()]
-        meters = Meter.query.filter(Meter.building_id.in_(user_building_ids)).all()
-    else:
-        meters = Meter.query.all()
-    return jsonify([m.to_dict() for m in meters])
-
+    """Получить все счётчики.
 
-@app.route('/meters/<int:id>', methods=['GET'])
+    Параметры запроса: q — префикс серийного номера; sort — id, serial_number
+    (с «-» в начале — по убыванию).
+    """
+    try:
+        _, sort_column, descending = parse_sort(METER_SORTS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    projection = METER_PROJECTION.only(parse_fields(METER_PROJECTION))
+    stmt = scope_to_tenant(projection.select(), current_user)
+    stmt = prefix_search(stmt, Meter.serial_number)
+    stmt = order_by_sort(stmt, sort_column, descending, Meter.id)
+    if wants_stream():
+        return ndjson_response(stmt, projection)
+    rows = db.session.execute(stmt)
+    return jsonify(list(projection.serialize(rows)))
+
+
+@api.route('/meters/<int:id>', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_meter_by_id(current_user, id):
     """Получить один счётчик по ID."""
-    meter = Meter.query.get_or_404(id)
+    fields = parse_fields(METER_PROJECTION)
+    meter = Meter.query.options(*METER_LOAD_OPTIONS).get_or_404(id)
 
     # Проверка прав доступа для tenant
-    if current_user.role.name == 'tenant':
-        building = Building.query.get(meter.building_id)
-        if not building or building.user_id != current_user.id:
-            return jsonify({"error": "Доступ запрещён"}), 403
+    if not visible_to(current_user, join_meter_owner(select(Meter.id)).where(Meter.id == id)):
+        return jsonify({"error": "Доступ запрещён"}), 403
 
-    return jsonify(meter.to_dict())
+    return jsonify(pick_fields(meter.to_dict(), fields))
 
 
-@app.route('/meters', methods=['POST'])
+@api.route('/meters', methods=['POST'])
 @require_role('admin')
 def create_meter(current_user):
     """Создать новый счётчик."""
@@ -447,7 +870,7 @@ def create_meter(current_user):
     return jsonify(m.to_dict()), 201
 
 
-@app.route('/meters/<int:id>', methods=['PUT'])
+@api.route('/meters/<int:id>', methods=['PUT'])
 @require_role('admin')
 def update_meter(current_user, id):
     """Обновить счётчик."""
@@ -466,7 +889,7 @@ def update_meter(current_user, id):
     return jsonify(meter.to_dict())
 
 
-@app.route('/meters/<int:id>', methods=['DELETE'])
+@api.route('/meters/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_meter(current_user, id):
     """Удалить счётчик."""
@@ -479,38 +902,81 @@ def delete_meter(current_user, id):
 # ========================
 # CONSUMPTION RECORDS
 # ========================
-@app.route('/consumption', methods=['GET'])
+@api.route('/consumption', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_consumption(current_user):
-    """Получить все записи потребления."""
-    if current_user.role.name == 'tenant':
-        building_ids = [b.id for b in Building.query.filter_by(user_id=current_user.id).all()]
-        meter_ids = [m.id for m in Meter.query.filter(Meter.building_id.in_(building_ids)).all()]
-        records = ConsumptionRecord.query.filter(ConsumptionRecord.meter_id.in_(meter_ids)).all()
+    """Получить записи потребления постранично (параметры и формат — в README, «API»)."""
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    meter_id = request.args.get('meter_id', type=int)
+    building_id = request.args.get('building_id', type=int)
+    try:
+        period_from = parse_date_arg('period_from')
+        period_to = parse_date_arg('period_to')
+        sort_key, sort_column, descending = parse_sort(CONSUMPTION_SORTS)
+        if cursor:
+            cursor_value, cursor_id = decode_cursor(cursor, sort_key, sort_column)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    fields = parse_fields(CONSUMPTION_PROJECTION)
+    if wants_stream():
+        projection = CONSUMPTION_PROJECTION.only(fields)
     else:
-        records = ConsumptionRecord.query.all()
-    return jsonify([r.to_dict() for r in records])
-
-
-@app.route('/consumption/<int:id>', methods=['GET'])
+        # Для курсора нужны id и поле сортировки, даже если клиент их не запросил
+        hidden = [] if fields is None else [key for key in dict.fromkeys(['id', sort_key]) if key not in fields]
+        projection = CONSUMPTION_PROJECTION.only(fields and fields + hidden)
+
+    stmt = scope_records_to_tenant(projection.select(), current_user)
+    stmt = prefix_search(stmt, Meter.serial_number, Building.name)
+
+    # Фильтры на стороне сервера (meters и buildings уже присоединены проекцией)
+    if meter_id is not None:
+        stmt = stmt.where(ConsumptionRecord.meter_id == meter_id)
+    if building_id is not None:
+        stmt = stmt.where(Meter.building_id == building_id)
+    if period_from is not None:
+        stmt = stmt.where(ConsumptionRecord.period_start >= period_from)
+    if period_to is not None:
+        stmt = stmt.where(ConsumptionRecord.period_start <= period_to)
+
+    # Keyset: следующая страница начинается строго после последней строки (значение, id)
+    if cursor:
+        stmt = after_cursor(stmt, sort_column, descending, ConsumptionRecord.id, cursor_value, cursor_id)
+    stmt = order_by_sort(stmt, sort_column, descending, ConsumptionRecord.id)
+    if wants_stream():
+        return ndjson_response(stmt, projection)
+    stmt = stmt.limit(limit + 1)
+    items = list(projection.serialize(db.session.execute(stmt)))
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_key, last[sort_key], last['id'])
+    if hidden:
+        for item in items:
+            for key in hidden:
+                del item[key]
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
+@api.route('/consumption/<int:id>', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_consumption_by_id(current_user, id):
     """Получить одну запись потребления по ID."""
-    record = ConsumptionRecord.query.get_or_404(id)
+    fields = parse_fields(CONSUMPTION_PROJECTION)
+    record = ConsumptionRecord.query.options(*CONSUMPTION_LOAD_OPTIONS).get_or_404(id)
 
     # Проверка прав доступа для tenant
-    if current_user.role.name == 'tenant':
-        # Проверяем, принадлежит ли запись tenant
-        building_ids = [b.id for b in Building.query.filter_by(user_id=current_user.id).all()]
-        meter_ids = [m.id for m in Meter.query.filter(Meter.building_id.in_(building_ids)).all()]
-
-        if record.meter_id not in meter_ids:
-            return jsonify({"error": "Доступ запрещён"}), 403
+    owner_check = join_consumption_owner(select(ConsumptionRecord.id)).where(ConsumptionRecord.id == id)
+    if not visible_to(current_user, owner_check):
+        return jsonify({"error": "Доступ запрещён"}), 403
 
-    return jsonify(record.to_dict())
+    return jsonify(pick_fields(record.to_dict(), fields))
 
 
-@app.route('/consumption', methods=['POST'])
+@api.route('/consumption', methods=['POST'])
 @require_role('admin', 'accountant')
 def create_consumption(current_user):
     """Создать новую запись потребления."""
@@ -521,24 +987,76 @@ def create_consumption(current_user):
         period_end = datetime.strptime(data['period_end'], '%Y-%m-%d').date()
     except ValueError:
         return jsonify({"error": "Неверный формат даты period_start или period_end"}), 400
+    try:
+        consumption_kwh = parse_kwh(data['consumption_kwh'])
+    except (TypeError, ValueError):
+        return jsonify({"error": "Некорректное значение consumption_kwh"}), 400
 
     r = ConsumptionRecord(
         meter_id=data['meter_id'],
         period_start=period_start,
         period_end=period_end,
-        consumption_kwh=data['consumption_kwh']
+        consumption_kwh=consumption_kwh
     )
     db.session.add(r)
+    deltas = rollups.new_deltas()
+    rollups.add_delta(deltas, r.meter_id, r.period_start, r.consumption_kwh, 1)
+    rollups.apply_deltas(deltas)
     db.session.commit()
     return jsonify(r.to_dict()), 201
 
 
-@app.route('/consumption/<int:id>', methods=['PUT'])
+@api.route('/consumption/bulk', methods=['POST'])
+@require_role('admin', 'accountant')
+def create_consumption_bulk(current_user):
+    """Пакетно загрузить показания: JSON-массив, CSV (text/csv) или NDJSON.
+
+    Некорректные строки не прерывают загрузку: они перечисляются в "errors"
+    с номером строки, остальные вставляются пачками по chunk_size в одной
+    транзакции.
+    """
+    chunk_size = request.args.get('chunk_size', current_app.config['BULK_CHUNK_SIZE'], type=int)
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size должен быть положительным"}), 400
+
+    try:
+        rows, errors = parse_rows(request.get_data(as_text=True), request.mimetype)
+    except ValueError as e:
+        return jsonify({"error": f"Не удалось разобрать тело запроса: {e}"}), 400
+    if not rows:
+        return jsonify({"error": "Пакет не содержит записей"}), 400
+
+    # Существование счётчиков проверяется одним запросом на каждую тысячу id
+    meter_ids = list(collect_meter_ids(rows))
+    known_meter_ids = set()
+    for i in range(0, len(meter_ids), 1000):
+        known_meter_ids.update(db.session.scalars(
+            select(Meter.id).where(Meter.id.in_(meter_ids[i:i + 1000]))
+        ))
+
+    valid, row_errors = validate_rows(rows, known_meter_ids)
+    errors = sorted(errors + row_errors, key=lambda e: e["row"])
+
+    deltas = rollups.new_deltas()
+    for i in range(0, len(valid), chunk_size):
+        db.session.execute(insert(ConsumptionRecord), valid[i:i + chunk_size])
+    for row in valid:
+        rollups.add_delta(deltas, row['meter_id'], row['period_start'], row['consumption_kwh'], 1)
+    rollups.apply_deltas(deltas)
+    db.session.commit()
+
+    report = {"inserted": len(valid), "failed": len(errors), "errors": errors}
+    return jsonify(report), 201 if valid else 400
+
+
+@api.route('/consumption/<int:id>', methods=['PUT'])
 @require_role('admin', 'accountant')
 def update_consumption(current_user, id):
     """Обновить запись потребления."""
     record = ConsumptionRecord.query.get_or_404(id)
     data = request.get_json()
+    deltas = rollups.new_deltas()
+    rollups.add_delta(deltas, record.meter_id, record.period_start, -record.consumption_kwh, -1)
     record.meter_id = data.get('meter_id', record.meter_id)
 
     if 'period_start' in data and data['period_start']:
@@ -553,81 +1071,291 @@ def update_consumption(current_user, id):
         except ValueError:
             return jsonify({"error": "Неверный формат даты period_end"}), 400
 
-    record.consumption_kwh = data.get('consumption_kwh', record.consumption_kwh)
+    if 'consumption_kwh' in data:
+        try:
+            record.consumption_kwh = parse_kwh(data['consumption_kwh'])
+        except (TypeError, ValueError):
+            return jsonify({"error": "Некорректное значение consumption_kwh"}), 400
+    rollups.add_delta(deltas, record.meter_id, record.period_start, record.consumption_kwh, 1)
+    rollups.apply_deltas(deltas)
     db.session.commit()
     return jsonify(record.to_dict())
 
 
-@app.route('/consumption/<int:id>', methods=['DELETE'])
+@api.route('/consumption/<int:id>', methods=['DELETE'])
 @require_role('admin')
 def delete_consumption(current_user, id):
     """Удалить запись потребления."""
     record = ConsumptionRecord.query.get_or_404(id)
+    deltas = rollups.new_deltas()
+    rollups.add_delta(deltas, record.meter_id, record.period_start, -record.consumption_kwh, -1)
     db.session.delete(record)
+    rollups.apply_deltas(deltas)
     db.session.commit()
     return '', 204
 
 
+# ========================
+# ДЕЛЬТА-СИНХРОНИЗАЦИЯ
+# ========================
+# Коллекция -> (сущность в журнале удалений, модель, проекция, роли, данные арендатора)
+SYNC_COLLECTIONS = {
+    'regions': ('region', Region, REGION_PROJECTION, ('tenant', 'accountant', 'admin'), False),
+    'tariffs': ('tariff', Tariff, TARIFF_PROJECTION, ('tenant', 'accountant', 'admin'), False),
+    'users': ('user', User, USER_PROJECTION, ('admin',), False),
+    'buildings': ('building', Building, BUILDING_PROJECTION, ('tenant', 'accountant', 'admin'), True),
+    'meters': ('meter', Meter, METER_PROJECTION, ('tenant', 'accountant', 'admin'), True),
+    'consumption': ('consumption', ConsumptionRecord, CONSUMPTION_PROJECTION, ('tenant', 'accountant', 'admin'), True),
+}
+
+# Больше изменений за раз не отдаётся: клиенту проще перезагрузить список
+MAX_CHANGES = MAX_PAGE_SIZE
+
+
+@api.route('/<any(regions, tariffs, users, buildings, meters, consumption):collection>/changes', methods=['GET'])
+@require_role('tenant', 'accountant', 'admin')
+def get_changes(current_user, collection):
+    """Изменения списка после токена синхронизации (протокол — в README, «API»)."""
+    entity, model, projection, roles, tenant_scoped = SYNC_COLLECTIONS[collection]
+    if current_user.role_name not in roles:
+        return jsonify({"error": "Недостаточно прав"}), 403
+    fields = parse_fields(projection)
+    token = sync.new_token()
+    if not request.args.get('since'):
+        return jsonify({"token": token})
+    try:
+        since = sync.parse_token(request.args['since'])
+    except ValueError:
+        return jsonify({"error": "Некорректный токен since"}), 400
+    if since < utcnow() - timedelta(days=current_app.config['SYNC_RETENTION_DAYS']):
+        return jsonify({"reset": True, "token": token})
+
+    projection = projection.only(fields and ['id'] + [key for key in fields if key != 'id'])
+    stmt = projection.select()
+    if tenant_scoped:
+        stmt = scope_to_tenant(stmt, current_user)
+    stmt = sync.changed_since(stmt, model, projection, since).order_by(model.id).limit(MAX_CHANGES + 1)
+    items = list(projection.serialize(db.session.execute(stmt)))
+    if len(items) > MAX_CHANGES:
+        return jsonify({"reset": True, "token": token})
+
+    owner_id = current_user.id if tenant_scoped and current_user.role_name == 'tenant' else None
+    # Строка из журнала, которая есть в выборке (здание сменило владельца), не удалена
+    present = {item['id'] for item in items}
+    deleted = [i for i in sync.deleted_since(entity, since, owner_id) if i not in present]
+    return jsonify({"items": items, "deleted": deleted, "token": token})
+
+
+# ========================
+# УВЕДОМЛЕНИЯ ОБ ИЗМЕНЕНИЯХ
+# ========================
+@api.route('/events', methods=['GET'])
+@require_role('tenant', 'accountant', 'admin')
+def stream_events(current_user):
+    """Поток Server-Sent Events об изменениях сущностей (события — в README, «API»)."""
+    entities = {
+        entity for entity, _, _, roles, _ in SYNC_COLLECTIONS.values()
+        if current_user.role_name in roles
+    }
+    heartbeat = current_app.config['EVENTS_HEARTBEAT']
+    bus = current_app.extensions['events']
+    subscription = bus.subscribe()
+
+    # Генератор работает вне контекста приложения и не обращается к БД:
+    # соединение возвращается в пул до начала потока
+    def generate():
+        try:
+            # Первый кусок сразу отправляет заголовки: клиент видит, что подписка активна
+            yield ': connected\n\n'
+            while True:
+                item = subscription.get(heartbeat)
+                if item is None:
+                    yield ': ping\n\n'
+                elif item.get('reset') or item.get('entity') in entities:
+                    yield events.format_sse(item)
+        finally:
+            bus.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 # ========================
 # СТАТИСТИКА И АНАЛИТИКА
 # ========================
-@app.route('/stats', methods=['GET'])
+@api.route('/stats', methods=['GET'])
 @require_role('tenant', 'accountant', 'admin')
 def get_stats(current_user):
-    """Получить статистику по системе."""
-    stats = {}
+    """Получить статистику по системе одним запросом к БД.
+
+    Стоимость считается по тарифу здания, если период показания
+    (period_start) попадает в срок действия тарифа; показания вне срока
+    учитываются в потреблении и отдельно в uncosted_consumption.
+    """
+    buildings_count = scope_to_tenant(select(func.count(Building.id)), current_user)
+    meters_count = scope_to_tenant(join_meter_owner(select(func.count(Meter.id))), current_user)
+
+    consumption = scope_to_tenant(
+        join_tariff_in_force(join_consumption_owner(select(
+            func.sum(ConsumptionRecord.consumption_kwh).label('kwh'),
+            func.sum(ConsumptionRecord.consumption_kwh * Tariff.rate_per_kwh).label('cost'),
+            func.sum(case((Tariff.id.is_(None), ConsumptionRecord.consumption_kwh))).label('uncosted')
+        ))),
+        current_user
+    ).subquery()
+
+    row = db.session.execute(select(
+        buildings_count.scalar_subquery(),
+        meters_count.scalar_subquery(),
+        consumption.c.kwh,
+        consumption.c.cost,
+        consumption.c.uncosted
+    )).one()
+    total_buildings, total_meters, kwh, cost, uncosted = row
+
+    stats = {
+        'total_buildings': total_buildings,
+        'total_meters': total_meters,
+        'total_consumption': float(kwh or 0),
+        'total_cost': round(float(cost or 0), 2),
+        'uncosted_consumption': float(uncosted or 0)
+    }
 
-    # Общее количество зданий
-    if current_user.role.name == 'tenant':
-        stats['total_buildings'] = Building.query.filter_by(user_id=current_user.id).count()
-    else:
-        stats['total_buildings'] = Building.query.count()
+    return jsonify(stats)
 
-    # Общее количество счетчиков
-    if current_user.role.name == 'tenant':
-        user_building_ids = [b.id for b in Building.query.filter_by(user_id=current_user.id).all()]
-        stats['total_meters'] = Meter.query.filter(Meter.building_id.in_(user_building_ids)).count()
-    else:
-        stats['total_meters'] = Meter.query.count()
-
-    # Общее потребление
-    if current_user.role.name == 'tenant':
-        building_ids = [b.id for b in Building.query.filter_by(user_id=current_user.id).all()]
-        meter_ids = [m.id for m in Meter.query.filter(Meter.building_id.in_(building_ids)).all()]
-        total_consumption = db.session.query(db.func.sum(ConsumptionRecord.consumption_kwh)).filter(
-            ConsumptionRecord.meter_id.in_(meter_ids)
-        ).scalar() or 0
-    else:
-        total_consumption = db.session.query(db.func.sum(ConsumptionRecord.consumption_kwh)).scalar() or 0
 
-    stats['total_consumption'] = float(total_consumption)
+# ========================
+# ОТЧЁТЫ
+# ========================
+@api.route('/reports/consumption-by-building', methods=['GET'])
+@require_role('tenant', 'accountant', 'admin')
+def report_consumption_by_building(current_user):
+    """Потребление и стоимость по объектам учёта, агрегированные в SQL.
 
-    # Общая стоимость (примерная)
-    stats['total_cost'] = stats['total_consumption'] * 5.50  # Примерная средняя цена
+    Параметры запроса: period_from, period_to (по period_start), region_id.
+    Стоимость считается, как в /stats, по тарифу, действующему в периоде показания.
+    """
+    region_id = request.args.get('region_id', type=int)
+    try:
+        period_from = parse_date_arg('period_from')
+        period_to = parse_date_arg('period_to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    total_kwh = func.sum(ConsumptionRecord.consumption_kwh)
+    total_cost = func.sum(ConsumptionRecord.consumption_kwh * Tariff.rate_per_kwh)
+    stmt = (
+        join_tariff_in_force(join_consumption_owner(select(
+            Building.id, Building.name, Region.name, total_kwh, total_cost
+        )))
+        .join(Region, Region.id == Building.region_id)
+        .group_by(Building.id, Building.name, Region.name)
+        .order_by(Building.name)
+    )
+    stmt = scope_to_tenant(stmt, current_user)
+    if region_id is not None:
+        stmt = stmt.where(Building.region_id == region_id)
+    if period_from is not None:
+        stmt = stmt.where(ConsumptionRecord.period_start >= period_from)
+    if period_to is not None:
+        stmt = stmt.where(ConsumptionRecord.period_start <= period_to)
+
+    items = [
+        {
+            'building_id': building_id,
+            'building_name': building_name,
+            'region_name': region_name,
+            'total_kwh': float(kwh or 0),
+            'total_cost_rub': round(float(cost or 0), 2),
+        }
+        for building_id, building_name, region_name, kwh, cost in db.session.execute(stmt)
+    ]
+    return jsonify({
+        "items": items,
+        "total_kwh": sum(i['total_kwh'] for i in items),
+        "total_cost_rub": round(sum(i['total_cost_rub'] for i in items), 2)
+    })
 
-    return jsonify(stats)
+
+@api.route('/reports/monthly', methods=['GET'])
+@require_role('tenant', 'accountant', 'admin')
+def report_monthly(current_user):
+    """Итоги потребления по месяцам или годам из consumption_rollups.
+
+    Параметры запроса: group_by = meter | building | region (по умолчанию building),
+    granularity = month | year, period_from, period_to (по месяцу).
+    Чтение идёт по корзинам итогов, а не по отдельным показаниям.
+    """
+    group_by = request.args.get('group_by', 'building')
+    granularity = request.args.get('granularity', 'month')
+    group_columns = {
+        'meter': (Meter.id, Meter.serial_number),
+        'building': (Building.id, Building.name),
+        'region': (Region.id, Region.name),
+    }
+    if group_by not in group_columns or granularity not in ('month', 'year'):
+        return jsonify({"error": "Недопустимое значение group_by или granularity"}), 400
+    try:
+        period_from = parse_date_arg('period_from')
+        period_to = parse_date_arg('period_to')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key_column, name_column = group_columns[group_by]
+    stmt = join_meter_owner(
+        select(
+            key_column, name_column, ConsumptionRollup.month,
+            func.sum(ConsumptionRollup.total_kwh), func.sum(ConsumptionRollup.record_count)
+        ).select_from(ConsumptionRollup).join(Meter, Meter.id == ConsumptionRollup.meter_id)
+    )
+    if group_by == 'region':
+        stmt = stmt.join(Region, Region.id == Building.region_id)
+    stmt = scope_to_tenant(stmt, current_user)
+    if period_from is not None:
+        stmt = stmt.where(ConsumptionRollup.month >= rollups.month_of(period_from))
+    if period_to is not None:
+        stmt = stmt.where(ConsumptionRollup.month <= period_to)
+    stmt = stmt.group_by(key_column, name_column, ConsumptionRollup.month).order_by(key_column, ConsumptionRollup.month)
+
+    # Годовые итоги складываются из уже сгруппированных месячных корзин
+    totals = {}
+    for key, name, month, kwh, count in db.session.execute(stmt):
+        period = month.strftime('%Y') if granularity == 'year' else month.strftime('%Y-%m')
+        item = totals.setdefault((key, period), {
+            f'{group_by}_id': key, 'name': name, 'period': period, 'total_kwh': 0.0, 'record_count': 0
+        })
+        item['total_kwh'] += float(kwh or 0)
+        item['record_count'] += int(count or 0)
+    return jsonify(list(totals.values()))
 
 
 # ========================
 # ОБРАБОТКА ОШИБОК
 # ========================
-@app.errorhandler(404)
+@api.app_errorhandler(400)
+def bad_request_error(error):
+    return jsonify({"error": error.description}), 400
+
+
+@api.app_errorhandler(404)
 def not_found_error(error):
     return jsonify({"error": "Ресурс не найден"}), 404
 
 
-@app.errorhandler(405)
+@api.app_errorhandler(405)
 def method_not_allowed_error(error):
     return jsonify({"error": "Метод не разрешен"}), 405
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return jsonify({"error": "Внутренняя ошибка сервера"}), 500
 
 
-@app.errorhandler(SQLAlchemyError)
+@api.app_errorhandler(SQLAlchemyError)
 def handle_db_error(e):
     db.session.rollback()
     return jsonify({"error": "Ошибка базы данных", "message": str(e)}), 500
@@ -636,11 +1364,83 @@ def handle_db_error(e):
 # ========================
 # HEALTH CHECK
 # ========================
-@app.route('/health', methods=['GET'])
+def pool_stats():
+    """Состояние пула соединений БД этого процесса.
+
+    size — постоянных соединений, checked_in — свободных, checked_out —
+    выданных запросам, overflow — открытых сверх size. Пулы без этих
+    счётчиков (например, у SQLite в памяти) сообщают только свой класс.
+    """
+    pool = db.engine.pool
+    stats = {"class": type(pool).__name__}
+    for key, name in (("size", "size"), ("checked_in", "checkedin"),
+                      ("checked_out", "checkedout"), ("overflow", "overflow")):
+        counter = getattr(pool, name, None)
+        if counter is not None:
+            stats[key] = counter()
+    if "overflow" in stats:
+        # QueuePool считает overflow от -size, пока пул заполнен не полностью
+        stats["overflow"] = max(stats["overflow"], 0)
+    return stats
+
+
+@api.route('/health', methods=['GET'])
 def health_check():
     """Проверка работоспособности API."""
-    return jsonify({"status": "ok", "message": "API работает"}), 200
+    return jsonify({
+        "status": "ok",
+        "message": "API работает",
+        "db_pool": pool_stats(),
+        "user_cache": user_cache.stats(),
+        "events": current_app.extensions['events'].stats()
+    }), 200
+
+
+# ========================
+# ФАБРИКА ПРИЛОЖЕНИЯ
+# ========================
+def create_app(config=None):
+    """Собрать приложение; config — настройки поверх переменных окружения."""
+    app = Flask(__name__)
+    # Быстрое кодирование JSON (orjson при наличии), даты — в ISO 8601
+    app.json = JSON_PROVIDER(app)
+    # URI БД, драйвер MySQL и пул соединений — из переменных окружения (config.py)
+    app.config.from_mapping(env_config())
+    if config:
+        app.config.from_mapping(config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = adapt_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    )
+
+    # === Инициализация CORS ===
+    CORS(app, resources={r"/*": {"origins": "http://localhost:8080"}}, supports_credentials=True)
+
+    # Сжатие ответов gzip/brotli по Accept-Encoding (порог — COMPRESS_MIN_SIZE байт)
+    init_compression(app)
+
+    db.init_app(app)
+
+    # Кэш пользователей для require_role: id -> (id, роль), TTL в секундах
+    app.config.setdefault('USER_CACHE_TTL', 60)
+    app.config.setdefault('USER_CACHE_SIZE', 1024)
+    app.extensions['user_cache'] = UserCache(
+        maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL']
+    )
+
+    # Размер пачки INSERT при пакетной загрузке показаний
+    app.config.setdefault('BULK_CHUNK_SIZE', 1000)
+
+    # Сколько дней хранится журнал удалений; более старый токен синхронизации
+    # требует полной перезагрузки списка
+    app.config.setdefault('SYNC_RETENTION_DAYS', 7)
+
+    # Уведомления об изменениях (GET /events); EVENTS_REDIS_URL — рассылка между воркерами
+    events.init_events(app)
+
+    app.register_blueprint(api)
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Сервер разработки с перезагрузчиком и отладчиком; в продакшене — wsgi.py
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
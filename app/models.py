@@ -1,11 +1,29 @@
 # app/models.py
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import Mapped, relationship
-from datetime import date
+from sqlalchemy.dialects.mysql import DATETIME as MYSQL_DATETIME
+from datetime import date, datetime, timezone
 from typing import List, Optional
 
 db = SQLAlchemy()
 
+
+def utcnow() -> datetime:
+    """Текущее время UTC без часового пояса — в таком виде отметки хранятся в БД."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Отметка времени с микросекундами (DATETIME в MySQL по умолчанию без долей секунды)
+Timestamp = db.DateTime().with_variant(MYSQL_DATETIME(fsp=6), 'mysql')
+
+
+def updated_at_column():
+    """Момент последнего INSERT/UPDATE строки для дельта-синхронизации (sync.py).
+
+    NULL у строк, которые не менялись с тех пор, как колонку добавил flask migrate.
+    """
+    return db.Column(Timestamp, nullable=True, default=utcnow, onupdate=utcnow, index=True)
+
 # =============== РОЛИ И ПОЛЬЗОВАТЕЛИ ===============
 class Role(db.Model):
     """Роли пользователей системы: tenant, accountant, admin"""
@@ -14,6 +32,9 @@ class Role(db.Model):
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     name: Mapped[str] = db.Column(db.String(20), unique=True, nullable=False)
 
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'name': self.name}
+
     def __repr__(self):
         return f"<Role {self.name}>"
 
@@ -26,6 +47,7 @@ class User(db.Model):
     login: Mapped[str] = db.Column(db.String(50), unique=True, nullable=False)
     password_hash: Mapped[str] = db.Column(db.String(128), nullable=False)  # для учебных целей plain-text допустим
     role_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     role: Mapped["Role"] = relationship("Role", lazy="joined")
 
@@ -36,6 +58,45 @@ class User(db.Model):
             'role': self.role.name if self.role else None
         }
 
+# =============== СЛУЖЕБНЫЕ ТАБЛИЦЫ ===============
+class TableVersion(db.Model):
+    """Счётчик версий справочной таблицы для ETag (увеличивается при каждом изменении)"""
+    __tablename__ = 'table_versions'
+
+    table_name: Mapped[str] = db.Column(db.String(50), primary_key=True)
+    version: Mapped[int] = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Таблицы, списки которых отдаются с ETag по версии (table_etag() в main.py)
+VERSIONED_TABLES = ('users', 'regions', 'tariffs')
+
+
+def ensure_table_versions() -> List[str]:
+    """Добавить в сессию недостающие строки table_versions (версия 0).
+
+    Вызывается из init-db, migrate и seed_demo(), чтобы bump_version() только
+    увеличивал существующий счётчик. Возвращает имена добавленных таблиц.
+    """
+    existing = set(db.session.scalars(db.select(TableVersion.table_name)))
+    missing = [name for name in VERSIONED_TABLES if name not in existing]
+    db.session.add_all(TableVersion(table_name=name, version=0) for name in missing)
+    return missing
+
+
+class Tombstone(db.Model):
+    """Запись об удалённой строке для дельта-синхронизации (GET /<сущность>/changes)"""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_entity_deleted_at', 'entity', 'deleted_at'),
+    )
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    entity: Mapped[str] = db.Column(db.String(30), nullable=False)  # region, building, consumption, ...
+    entity_id: Mapped[int] = db.Column(db.Integer, nullable=False)
+    owner_id: Mapped[Optional[int]] = db.Column(db.Integer, nullable=True)  # buildings.user_id для данных арендатора
+    deleted_at: Mapped[datetime] = db.Column(Timestamp, nullable=False, default=utcnow)
+
+
 # =============== ОСНОВНЫЕ СУЩНОСТИ ===============
 class Region(db.Model):
     """Регион (город, район)"""
@@ -44,6 +105,7 @@ class Region(db.Model):
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     name: Mapped[str] = db.Column(db.String(100), nullable=False)
     timezone: Mapped[str] = db.Column(db.String(50), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     buildings:  Mapped[List["Building"]] = relationship("Building", back_populates="region", cascade="all, delete-orphan")
 
@@ -60,20 +122,32 @@ class Tariff(db.Model):
     rate_per_kwh: Mapped[float] = db.Column(db.Float, nullable=False)
     valid_from: Mapped[date] = db.Column(db.Date, nullable=False)
     valid_to: Mapped[Optional[date]] = db.Column(db.Date, nullable=True)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     def to_dict(self) -> dict:
         return {
             'id': self.id,
             'name': self.name,
             'rate_per_kwh': self.rate_per_kwh,
-            'valid_from': self.valid_from.isoformat(),
-            'valid_to': self.valid_to.isoformat() if self.valid_to else None
+            'valid_from': self.valid_from,
+            'valid_to': self.valid_to
         }
 
+    def in_force(self, day: date) -> bool:
+        """Тариф действует в день day (то же условие, что TARIFF_IN_FORCE в serializers.py)."""
+        return self.valid_from <= day and (self.valid_to is None or self.valid_to >= day)
+
 
 class Building(db.Model):
     """Объект учёта (дом, предприятие), принадлежащий пользователю"""
     __tablename__ = 'buildings'
+    __table_args__ = (
+        # Все запросы арендатора фильтруют здания по владельцу
+        db.Index('ix_buildings_user_id', 'user_id'),
+        # Поиск по префиксу (LIKE 'abc%') и сортировка списка зданий
+        db.Index('ix_buildings_name', 'name'),
+        db.Index('ix_buildings_address', 'address'),
+    )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     name: Mapped[str] = db.Column(db.String(150), nullable=False)
@@ -82,6 +156,7 @@ class Building(db.Model):
     region_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('regions.id'), nullable=False)
     tariff_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('tariffs.id'), nullable=False)
     user_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     region: Mapped["Region"] = relationship("Region", back_populates="buildings")
     tariff: Mapped["Tariff"] = relationship("Tariff")
@@ -106,20 +181,26 @@ class Building(db.Model):
 class Meter(db.Model):
     """Счётчик электроэнергии"""
     __tablename__ = 'meters'
+    __table_args__ = (
+        # Соединение meters → buildings при проверке владельца
+        db.Index('ix_meters_building_id', 'building_id'),
+    )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     serial_number: Mapped[str] = db.Column(db.String(100), unique=True, nullable=False)
     installation_date: Mapped[date] = db.Column(db.Date, nullable=False)
     building_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('buildings.id'), nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     building: Mapped["Building"] = relationship("Building", back_populates="meters")
     records: Mapped[List["ConsumptionRecord"]] = relationship("ConsumptionRecord", back_populates="meter", cascade="all, delete-orphan")
+    rollups: Mapped[List["ConsumptionRollup"]] = relationship("ConsumptionRollup", cascade="all, delete-orphan")
 
     def to_dict(self) -> dict:
         return {
             'id': self.id,
             'serial_number': self.serial_number,
-            'installation_date': self.installation_date.isoformat(),
+            'installation_date': self.installation_date,
             'building_id': self.building_id,
             'building_name': self.building.name if self.building else None
         }
@@ -128,29 +209,49 @@ class Meter(db.Model):
 class ConsumptionRecord(db.Model):
     """Запись потребления электроэнергии за период"""
     __tablename__ = 'consumption_records'
+    __table_args__ = (
+        # Выборки показаний по счётчику и периоду; префикс покрывает и поиск по meter_id
+        db.Index('ix_consumption_records_meter_period', 'meter_id', 'period_start'),
+        # Постраничная выдача с сортировкой по периоду (ключ period_start, id)
+        db.Index('ix_consumption_records_period_start', 'period_start'),
+    )
 
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     meter_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('meters.id'), nullable=False)
     period_start: Mapped[date] = db.Column(db.Date, nullable=False)
     period_end: Mapped[date] = db.Column(db.Date, nullable=False)
     consumption_kwh: Mapped[float] = db.Column(db.Float, nullable=False)
+    updated_at: Mapped[Optional[datetime]] = updated_at_column()
 
     meter: Mapped["Meter"] = relationship("Meter", back_populates="records")
 
     def to_dict(self) -> dict:
         cost = None
-        if self.meter and self.meter.building and self.meter.building.tariff:
-            rate = self.meter.building.tariff.rate_per_kwh
-            if rate is not None:
-                cost = self.consumption_kwh * rate
+        tariff = self.meter.building.tariff if self.meter and self.meter.building else None
+        if tariff and tariff.rate_per_kwh is not None and tariff.in_force(self.period_start):
+            cost = self.consumption_kwh * tariff.rate_per_kwh
 
         return {
             'id': self.id,
             'meter_id': self.meter_id,
-            'period_start': self.period_start.isoformat(),
-            'period_end': self.period_end.isoformat(),
+            'period_start': self.period_start,
+            'period_end': self.period_end,
             'consumption_kwh': self.consumption_kwh,
             'meter_serial': self.meter.serial_number if self.meter else None,
             'building_name': self.meter.building.name if self.meter and self.meter.building else None,
             'estimated_cost_rub': round(cost, 2) if cost is not None else None
-        }
\ No newline at end of file
+        }
+
+
+class ConsumptionRollup(db.Model):
+    """Месячный итог потребления по счётчику.
+
+    Поддерживается инкрементально при изменении показаний (см. rollups.py);
+    итоги по зданиям и регионам получаются соединением с meters/buildings.
+    """
+    __tablename__ = 'consumption_rollups'
+
+    meter_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('meters.id'), primary_key=True)
+    month: Mapped[date] = db.Column(db.Date, primary_key=True)  # первое число месяца
+    total_kwh: Mapped[float] = db.Column(db.Float, nullable=False, default=0.0)
+    record_count: Mapped[int] = db.Column(db.Integer, nullable=False, default=0)
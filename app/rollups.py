@@ -0,0 +1,104 @@
+# app/rollups.py
+"""Инкрементальное обновление месячных итогов потребления (consumption_rollups).
+
+Обработчики показаний собирают приращения по корзинам (счётчик, месяц) и
+применяют их в той же транзакции, что и само изменение показаний.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, ConsumptionRecord, ConsumptionRollup
+
+Deltas = Dict[Tuple[int, date], list]
+
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+
+def new_deltas() -> Deltas:
+    return defaultdict(lambda: [0.0, 0])
+
+
+def add_delta(deltas: Deltas, meter_id: int, period_start: date, kwh: float, count: int) -> None:
+    """Учесть приращение kwh/count в корзине счётчика за месяц period_start."""
+    bucket = deltas[(meter_id, month_of(period_start))]
+    bucket[0] += kwh
+    bucket[1] += count
+
+
+def apply_deltas(deltas: Deltas) -> None:
+    """Применить приращения к consumption_rollups (upsert) в текущей транзакции.
+
+    На MySQL и SQLite используется атомарный INSERT ... ON DUPLICATE KEY /
+    ON CONFLICT, поэтому параллельные запросы не теряют обновления.
+    Опустевшие корзины удаляются.
+    """
+    rows = [
+        {'meter_id': meter_id, 'month': month, 'total_kwh': kwh, 'record_count': count}
+        for (meter_id, month), (kwh, count) in deltas.items()
+        if kwh or count
+    ]
+    if not rows:
+        return
+
+    table = ConsumptionRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            total_kwh=table.c.total_kwh + stmt.inserted.total_kwh,
+            record_count=table.c.record_count + stmt.inserted.record_count
+        )
+        db.session.execute(stmt, rows)
+    elif dialect == 'sqlite':
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.meter_id, table.c.month],
+            set_={
+                'total_kwh': table.c.total_kwh + stmt.excluded.total_kwh,
+                'record_count': table.c.record_count + stmt.excluded.record_count
+            }
+        )
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            bucket = db.session.get(ConsumptionRollup, (row['meter_id'], row['month']), with_for_update=True)
+            if bucket is None:
+                db.session.add(ConsumptionRollup(**row))
+            else:
+                bucket.total_kwh += row['total_kwh']
+                bucket.record_count += row['record_count']
+        db.session.flush()
+
+    if any(row['record_count'] < 0 for row in rows):
+        meter_ids = {row['meter_id'] for row in rows}
+        db.session.execute(
+            delete(table).where(table.c.meter_id.in_(meter_ids), table.c.record_count <= 0)
+        )
+
+
+def rebuild_all(batch_size: int = 1000) -> int:
+    """Пересчитать все итоги с нуля по consumption_records. Возвращает число корзин."""
+    deltas = new_deltas()
+    result = db.session.execute(
+        select(ConsumptionRecord.meter_id, ConsumptionRecord.period_start, ConsumptionRecord.consumption_kwh)
+        .execution_options(yield_per=batch_size)
+    )
+    for meter_id, period_start, kwh in result:
+        add_delta(deltas, meter_id, period_start, kwh, 1)
+
+    db.session.execute(delete(ConsumptionRollup.__table__))
+    rows = [
+        {'meter_id': meter_id, 'month': month, 'total_kwh': kwh, 'record_count': count}
+        for (meter_id, month), (kwh, count) in deltas.items()
+    ]
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(insert(ConsumptionRollup), rows[i:i + batch_size])
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,120 @@
+# app/seed.py
+"""Демонстрационные данные для разработки, тестов и бенчмарков.
+
+seed_demo() наполняет пустую базу: роли, администратор, бухгалтер и
+арендаторы (пароль совпадает с логином), регионы, тарифы, здания
+арендаторов, счётчики и помесячные показания. Показания вставляются
+пачками, как в /consumption/bulk, месячные итоги пересчитываются один раз
+в конце, версии справочников для ETag увеличиваются. Данные
+детерминированы: одинаковые параметры дают одинаковую базу.
+"""
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import insert, update
+
+import rollups
+from models import (
+    db, ensure_table_versions, VERSIONED_TABLES, TableVersion,
+    Role, User, Region, Tariff, Building, Meter, ConsumptionRecord
+)
+
+BUILDING_TYPES = ('жилое', 'промышленное', 'общественное')
+
+
+def _month_start(first: date, offset: int) -> date:
+    index = first.month - 1 + offset
+    return date(first.year + index // 12, index % 12 + 1, 1)
+
+
+def seed_demo(buildings: int = 20, meters_per_building: int = 2, months: int = 12,
+              tenants: int = 3, first_month: date = date(2024, 1, 1), seed: int = 0,
+              chunk_size: int = 1000) -> dict:
+    """Создать таблицы и заполнить их данными. Возвращает число созданных строк по сущностям.
+
+    Вызывается в контексте приложения; логины фиксированы, поэтому база
+    должна быть пустой.
+    """
+    rng = random.Random(seed)
+    db.create_all()
+
+    roles = {role.name: role for role in Role.query.all()}
+    for name in ('tenant', 'accountant', 'admin'):
+        if name not in roles:
+            roles[name] = Role(name=name)
+            db.session.add(roles[name])
+
+    users = [User(login='admin', password_hash='admin', role=roles['admin']),
+             User(login='accountant', password_hash='accountant', role=roles['accountant'])]
+    tenant_users = [
+        User(login=f'tenant{i}', password_hash=f'tenant{i}', role=roles['tenant'])
+        for i in range(1, tenants + 1)
+    ]
+    regions = [Region(name=name, timezone=tz) for name, tz in
+               (('Москва', 'UTC+3'), ('Уфа', 'UTC+5'), ('Новосибирск', 'UTC+7'))]
+    tariffs = [
+        Tariff(name='Базовый', rate_per_kwh=5.37, valid_from=first_month),
+        Tariff(name='Льготный', rate_per_kwh=3.86, valid_from=first_month),
+        Tariff(name='Коммерческий', rate_per_kwh=8.12, valid_from=first_month),
+    ]
+    db.session.add_all(users + tenant_users + regions + tariffs)
+    db.session.flush()
+
+    building_rows = [
+        Building(
+            name=f'Объект №{i}',
+            address=f'ул. Ленина, {i}',
+            type=BUILDING_TYPES[i % len(BUILDING_TYPES)],
+            region_id=regions[i % len(regions)].id,
+            tariff_id=tariffs[i % len(tariffs)].id,
+            user_id=tenant_users[i % len(tenant_users)].id if tenant_users else users[0].id,
+        )
+        for i in range(1, buildings + 1)
+    ]
+    db.session.add_all(building_rows)
+    db.session.flush()
+
+    meter_rows = [
+        Meter(
+            serial_number=f'SN-{building.id:05d}-{j}',
+            installation_date=first_month - timedelta(days=rng.randint(30, 3650)),
+            building_id=building.id,
+        )
+        for building in building_rows
+        for j in range(1, meters_per_building + 1)
+    ]
+    db.session.add_all(meter_rows)
+    db.session.flush()
+
+    records = []
+    for meter in meter_rows:
+        base = rng.uniform(80, 600)
+        for offset in range(months):
+            start = _month_start(first_month, offset)
+            records.append({
+                'meter_id': meter.id,
+                'period_start': start,
+                'period_end': _month_start(first_month, offset + 1) - timedelta(days=1),
+                'consumption_kwh': round(base * rng.uniform(0.7, 1.3), 2),
+            })
+    for i in range(0, len(records), chunk_size):
+        db.session.execute(insert(ConsumptionRecord), records[i:i + chunk_size])
+    # Пользователи, регионы и тарифы изменились: ETag их списков должен смениться
+    ensure_table_versions()
+    db.session.flush()
+    db.session.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name.in_(VERSIONED_TABLES))
+        .values(version=TableVersion.version + 1)
+    )
+    db.session.commit()
+    rollups.rebuild_all()
+
+    return {
+        'users': len(users) + len(tenant_users),
+        'regions': len(regions),
+        'tariffs': len(tariffs),
+        'buildings': len(building_rows),
+        'meters': len(meter_rows),
+        'consumption': len(records),
+    }
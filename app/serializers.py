@@ -0,0 +1,169 @@
+# app/serializers.py
+"""Колоночные проекции для списковых эндпоинтов.
+
+Вместо загрузки ORM-объектов и вызова to_dict() выбираются только нужные
+колонки в виде кортежей. Имена полей совпадают с тем, что отдают to_dict()
+моделей, поэтому формат ответа API не меняется. Даты остаются объектами
+date: в ISO 8601 их кодирует JSON-провайдер приложения (json_provider.py).
+"""
+from sqlalchemy import and_, or_, select
+from models import Role, User, Region, Tariff, Building, Meter, ConsumptionRecord
+
+
+# Условие соединения tariffs с показаниями: тариф здания, действующий на начало
+# периода показания. Показания вне срока тарифа остаются без стоимости
+TARIFF_IN_FORCE = and_(
+    Tariff.id == Building.tariff_id,
+    Tariff.valid_from <= ConsumptionRecord.period_start,
+    or_(Tariff.valid_to.is_(None), Tariff.valid_to >= ConsumptionRecord.period_start)
+)
+
+
+def _money(value):
+    return round(value, 2) if value is not None else None
+
+
+class Projection:
+    """Набор именованных колонок сущности с нужными соединениями и форматтерами.
+
+    Соединение — (таблица, условие, внешний ключ): внешний ключ — колонка уже
+    присоединённой таблицы, ссылающаяся на эту; по нему sync.changed_since()
+    находит строки, которые задело изменение присоединённой записи.
+    """
+
+    def __init__(self, entity, columns: dict, joins=(), formatters: dict = None):
+        self.entity = entity
+        self.columns = columns
+        self.joins = joins
+        self.formatters = formatters or {}
+        self.keys = list(columns)
+
+    def only(self, fields):
+        """Проекция с подмножеством полей в заданном порядке (для ?fields=).
+
+        None — все поля. Соединения сохраняются: по присоединённым таблицам
+        могут фильтровать вызывающий код и scope_to_tenant().
+        """
+        if fields is None:
+            return self
+        return Projection(
+            self.entity,
+            {key: self.columns[key] for key in fields},
+            self.joins,
+            {key: fmt for key, fmt in self.formatters.items() if key in fields},
+        )
+
+    def select(self):
+        """SELECT только нужных колонок; условия и сортировку добавляет вызывающий код."""
+        stmt = select(*[expr.label(key) for key, expr in self.columns.items()]).select_from(self.entity)
+        for target, onclause, _ in self.joins:
+            stmt = stmt.outerjoin(target, onclause)
+        return stmt
+
+    def serialize(self, rows):
+        """Превратить кортежи результата в словари с полями как у to_dict()."""
+        keys = self.keys
+        formatters = list(self.formatters.items())
+        for row in rows:
+            item = dict(zip(keys, row))
+            for key, fmt in formatters:
+                item[key] = fmt(item[key])
+            yield item
+
+
+ROLE_PROJECTION = Projection(
+    Role,
+    {
+        'id': Role.id,
+        'name': Role.name,
+    },
+)
+
+USER_PROJECTION = Projection(
+    User,
+    {
+        'id': User.id,
+        'login': User.login,
+        'role': Role.name,
+    },
+    joins=(
+        (Role, Role.id == User.role_id, User.role_id),
+    ),
+)
+
+REGION_PROJECTION = Projection(
+    Region,
+    {
+        'id': Region.id,
+        'name': Region.name,
+        'timezone': Region.timezone,
+    },
+)
+
+TARIFF_PROJECTION = Projection(
+    Tariff,
+    {
+        'id': Tariff.id,
+        'name': Tariff.name,
+        'rate_per_kwh': Tariff.rate_per_kwh,
+        'valid_from': Tariff.valid_from,
+        'valid_to': Tariff.valid_to,
+    },
+)
+
+BUILDING_PROJECTION = Projection(
+    Building,
+    {
+        'id': Building.id,
+        'name': Building.name,
+        'address': Building.address,
+        'type': Building.type,
+        'region_id': Building.region_id,
+        'tariff_id': Building.tariff_id,
+        'user_id': Building.user_id,
+        'region_name': Region.name,
+        'tariff_name': Tariff.name,
+        'owner_login': User.login,
+    },
+    joins=(
+        (Region, Region.id == Building.region_id, Building.region_id),
+        (Tariff, Tariff.id == Building.tariff_id, Building.tariff_id),
+        (User, User.id == Building.user_id, Building.user_id),
+    ),
+)
+
+METER_PROJECTION = Projection(
+    Meter,
+    {
+        'id': Meter.id,
+        'serial_number': Meter.serial_number,
+        'installation_date': Meter.installation_date,
+        'building_id': Meter.building_id,
+        'building_name': Building.name,
+    },
+    joins=(
+        (Building, Building.id == Meter.building_id, Meter.building_id),
+    ),
+)
+
+CONSUMPTION_PROJECTION = Projection(
+    ConsumptionRecord,
+    {
+        'id': ConsumptionRecord.id,
+        'meter_id': ConsumptionRecord.meter_id,
+        'period_start': ConsumptionRecord.period_start,
+        'period_end': ConsumptionRecord.period_end,
+        'consumption_kwh': ConsumptionRecord.consumption_kwh,
+        'meter_serial': Meter.serial_number,
+        'building_name': Building.name,
+        'estimated_cost_rub': ConsumptionRecord.consumption_kwh * Tariff.rate_per_kwh,
+    },
+    joins=(
+        (Meter, Meter.id == ConsumptionRecord.meter_id, ConsumptionRecord.meter_id),
+        (Building, Building.id == Meter.building_id, Meter.building_id),
+        # Внешнее соединение по сроку тарифа даёт tariffs.id = NULL вне срока,
+        # поэтому изменения тарифа ищутся по buildings.tariff_id
+        (Tariff, TARIFF_IN_FORCE, Building.tariff_id),
+    ),
+    formatters={'estimated_cost_rub': _money},
+)
@@ -0,0 +1,153 @@
+# app/sync.py
+"""Дельта-синхронизация списков (GET /<сущность>/changes).
+
+Изменённые строки находятся по updated_at, которую SQLAlchemy проставляет
+при INSERT и UPDATE, удалённые — по журналу tombstones, который заполняет
+событие before_delete (в том числе для каскадно удаляемых строк). Смена
+владельца здания для прежнего арендатора выглядит как удаление: здание,
+его счётчики и показания попадают в журнал с прежним owner_id.
+
+Токен синхронизации — момент начала запроса. Следующий запрос берёт
+изменения с запасом SYNC_OVERLAP назад, чтобы не пропустить транзакцию,
+проставившую отметку раньше, а зафиксированную позже; повторно присланные
+строки клиент просто обновляет.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, event, insert, inspect, literal, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from models import db, utcnow, Region, Tariff, User, Building, Meter, ConsumptionRecord, Tombstone
+
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+# Владельцы, найденные за текущий flush: при каскадном удалении здания
+# владелец выбирается один раз на счётчик, а не на каждое показание
+OWNER_CACHE_KEY = 'tombstone_owners'
+
+
+def _owner_cache(target):
+    return object_session(target).info.setdefault(OWNER_CACHE_KEY, {})
+
+
+def _building_owner(connection, building):
+    return building.user_id
+
+
+def _meter_owner(connection, meter):
+    owners = _owner_cache(meter)
+    key = ('building', meter.building_id)
+    if key not in owners:
+        owners[key] = connection.scalar(select(Building.user_id).where(Building.id == meter.building_id))
+    return owners[key]
+
+
+def _record_owner(connection, record):
+    owners = _owner_cache(record)
+    key = ('meter', record.meter_id)
+    if key not in owners:
+        row = connection.execute(
+            select(Meter.building_id, Building.user_id)
+            .join(Building, Building.id == Meter.building_id)
+            .where(Meter.id == record.meter_id)
+        ).first()
+        owners[key] = row.user_id if row else None
+        if row:
+            owners[('building', row.building_id)] = row.user_id
+    return owners[key]
+
+
+# Модель -> (сущность в журнале, функция владельца для фильтра арендатора или None)
+TRACKED = {
+    Region: ('region', None),
+    Tariff: ('tariff', None),
+    User: ('user', None),
+    Building: ('building', _building_owner),
+    Meter: ('meter', _meter_owner),
+    ConsumptionRecord: ('consumption', _record_owner),
+}
+
+
+def _record_tombstone(mapper, connection, target):
+    entity, owner_of = TRACKED[mapper.class_]
+    connection.execute(insert(Tombstone.__table__).values(
+        entity=entity,
+        entity_id=target.id,
+        owner_id=owner_of(connection, target) if owner_of else None,
+        deleted_at=utcnow()
+    ))
+
+
+def _record_owner_change(mapper, connection, target):
+    """Здание передано другому арендатору: убрать его строки из списков прежнего."""
+    old_owners = inspect(target).attrs.user_id.history.deleted
+    if not old_owners or old_owners[0] is None or old_owners[0] == target.user_id:
+        return
+    owner_id, now = old_owners[0], utcnow()
+    columns = ['entity', 'entity_id', 'owner_id', 'deleted_at']
+    connection.execute(insert(Tombstone.__table__).values(
+        entity='building', entity_id=target.id, owner_id=owner_id, deleted_at=now
+    ))
+    connection.execute(insert(Tombstone.__table__).from_select(columns, select(
+        literal('meter'), Meter.id, literal(owner_id), literal(now)
+    ).where(Meter.building_id == target.id)))
+    connection.execute(insert(Tombstone.__table__).from_select(columns, select(
+        literal('consumption'), ConsumptionRecord.id, literal(owner_id), literal(now)
+    ).join(Meter, Meter.id == ConsumptionRecord.meter_id).where(Meter.building_id == target.id)))
+
+
+for _model in TRACKED:
+    event.listen(_model, 'before_delete', _record_tombstone)
+event.listen(Building, 'before_update', _record_owner_change)
+
+
+@event.listens_for(Session, 'after_flush')
+def _clear_owner_cache(session, flush_context):
+    session.info.pop(OWNER_CACHE_KEY, None)
+
+
+def new_token() -> str:
+    """Токен для следующего запроса изменений (для клиента непрозрачен)."""
+    return utcnow().isoformat()
+
+
+def parse_token(token: str) -> datetime:
+    """Момент, с которого искать изменения; ValueError для некорректного токена."""
+    return datetime.fromisoformat(token) - SYNC_OVERLAP
+
+
+def changed_since(stmt, model, projection, since: datetime):
+    """Оставить в выборке проекции строки, изменившиеся начиная с since.
+
+    Строка считается изменённой и тогда, когда изменилась присоединённая
+    запись, из которой проекция берёт поля (название здания, тариф и т.п.).
+    id таких записей выбираются заранее по индексу updated_at и сравниваются
+    с внешним ключом, который на них ссылается: id самой присоединённой
+    записи может быть NULL (тариф перестал действовать в периоде показания).
+    Если изменённых записей нет, условие сводится к индексу updated_at
+    основной таблицы.
+    """
+    conditions = [model.updated_at >= since]
+    for target, _, foreign_key in projection.joins:
+        if target in TRACKED:
+            ids = db.session.scalars(select(target.id).where(target.updated_at >= since)).all()
+            if ids:
+                conditions.append(foreign_key.in_(ids))
+    return stmt.where(or_(*conditions))
+
+
+def deleted_since(entity: str, since: datetime, owner_id: Optional[int] = None) -> List[int]:
+    """id строк сущности, удалённых начиная с since (для арендатора — только его)."""
+    stmt = select(Tombstone.entity_id).where(Tombstone.entity == entity, Tombstone.deleted_at >= since)
+    if owner_id is not None:
+        stmt = stmt.where(Tombstone.owner_id == owner_id)
+    return list(dict.fromkeys(db.session.scalars(stmt.order_by(Tombstone.id))))
+
+
+def purge_tombstones(older_than: datetime) -> int:
+    """Удалить записи журнала старше older_than. Возвращает их число."""
+    result = db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < older_than))
+    db.session.commit()
+    return result.rowcount
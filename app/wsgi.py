@@ -0,0 +1,35 @@
+# app/wsgi.py
+"""Точка входа WSGI для продакшен-запуска (вместо сервера разработки main.py).
+
+Запуск из каталога app:
+    gunicorn -c gunicorn.conf.py wsgi:app   # Linux, контейнер
+    python wsgi.py                          # waitress (pip install waitress), например на Windows
+
+Параметры waitress задаются переменными окружения WAITRESS_*. Под waitress
+все потоки работают в одном процессе, поэтому пул соединений БД по
+умолчанию равен WAITRESS_THREADS (а не GUNICORN_THREADS, см. config.py).
+"""
+import os
+
+WAITRESS_THREADS = int(os.environ.get('WAITRESS_THREADS', 16))
+
+if __name__ == '__main__':
+    # До create_app(): пул соединений читается из окружения при создании приложения
+    os.environ.setdefault('DB_POOL_SIZE', str(WAITRESS_THREADS))
+
+from main import create_app
+
+app = create_app()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    serve(
+        app,
+        host=os.environ.get('WAITRESS_HOST', '0.0.0.0'),
+        port=int(os.environ.get('WAITRESS_PORT', 5000)),
+        threads=WAITRESS_THREADS,
+        connection_limit=int(os.environ.get('WAITRESS_CONNECTION_LIMIT', 200)),
+        channel_timeout=int(os.environ.get('WAITRESS_CHANNEL_TIMEOUT', 120)),
+    )
@@ -0,0 +1,77 @@
+# benchmarks/api_endpoints.py
+"""Бенчмарк эндпоинтов API на изолированном экземпляре без сервера БД.
+
+Приложение собирается create_app() с SQLite (по умолчанию в памяти) и
+наполняется seed_demo(), запросы идут через тестовый клиент Flask — без
+сети и без MySQL. Показывает стоимость обработки запроса в самом
+приложении (выборка, сериализация, JSON); абсолютные числа на MySQL будут
+другими, но сравнивать версии кода между собой так удобно.
+
+Запуск из корня репозитория:
+    python benchmarks/api_endpoints.py [--buildings 200] [--months 24] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from main import create_app
+from models import db, User
+from seed import seed_demo
+
+ENDPOINTS = [
+    '/buildings',
+    '/meters',
+    '/consumption?limit=500',
+    '/consumption?limit=500&sort=-period_start',
+    '/stats',
+    '/reports/monthly',
+    '/reports/consumption-by-building',
+]
+
+
+def measure(client, path, headers, repeat):
+    """Лучшее и медианное время ответа (мс) и размер тела (байт)."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        body = response.get_data()
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f'{path}: HTTP {response.status_code} {body[:200]!r}')
+    timings.sort()
+    return timings[0], timings[len(timings) // 2], len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='sqlite://', help='URI SQLAlchemy (по умолчанию SQLite в памяти)')
+    parser.add_argument('--buildings', type=int, default=200)
+    parser.add_argument('--meters', type=int, default=2)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--role', choices=('admin', 'accountant'), default='admin',
+                        help='от чьего имени выполнять запросы')
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database})
+    started = time.perf_counter()
+    with app.app_context():
+        counts = seed_demo(buildings=args.buildings, meters_per_building=args.meters, months=args.months)
+        user_id = db.session.scalar(db.select(User.id).where(User.login == args.role))
+    print(f'база: {args.database}, заполнена за {(time.perf_counter() - started) * 1000:.0f} мс: '
+          + ', '.join(f'{name} {count}' for name, count in counts.items()))
+
+    client = app.test_client()
+    headers = {'X-User-ID': str(user_id), 'Accept-Encoding': 'identity'}
+    print(f'{"эндпоинт":<46}{"лучшее, мс":>12}{"медиана, мс":>13}{"байт":>11}')
+    for path in ENDPOINTS:
+        best, median, size = measure(client, path, headers, args.repeat)
+        print(f'{path:<46}{best:>12.1f}{median:>13.1f}{size:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/json_encoding.py
+"""Микробенчмарк кодирования списка показаний в JSON.
+
+Сравнивает прежний путь (даты форматируются isoformat() в каждой строке,
+DefaultJSONProvider Flask с ensure_ascii и сортировкой ключей) с текущим
+(даты как есть, провайдер из app/json_provider.py) на строках формата
+CONSUMPTION_PROJECTION. База данных не нужна: строки генерируются в памяти.
+
+Запуск из корня репозитория:
+    python benchmarks/json_encoding.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from models import ConsumptionRecord
+from serializers import Projection, CONSUMPTION_PROJECTION
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+# Проекция показаний в прежнем виде: даты форматируются в Python по строкам
+LEGACY_CONSUMPTION_PROJECTION = Projection(
+    ConsumptionRecord,
+    CONSUMPTION_PROJECTION.columns,
+    CONSUMPTION_PROJECTION.joins,
+    {'period_start': _iso, 'period_end': _iso, **CONSUMPTION_PROJECTION.formatters},
+)
+
+
+def make_rows(count):
+    """Кортежи в порядке колонок CONSUMPTION_PROJECTION, как их вернул бы курсор БД."""
+    rows = []
+    for i in range(count):
+        month = i % 12 + 1
+        year = 2020 + i // 12 % 5
+        kwh = 100.0 + i % 250 * 1.5
+        rows.append((
+            i + 1,
+            i % 500 + 1,
+            date(year, month, 1),
+            date(year, month, 28),
+            kwh,
+            f'SN-{i % 500:06d}',
+            f'Жилой дом №{i % 120}',
+            kwh * 5.37,
+        ))
+    return rows
+
+
+def measure(provider, projection, rows, repeat):
+    """Лучшее время сериализации + кодирования (мс) и размер тела ответа (байт)."""
+    best = None
+    with provider._app.app_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = provider.response(list(projection.serialize(rows))).get_data()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    rows = make_rows(args.rows)
+    cases = [
+        ('before: isoformat + DefaultJSONProvider', DefaultJSONProvider(app), LEGACY_CONSUMPTION_PROJECTION),
+        ('after: StdlibJSONProvider', json_provider.StdlibJSONProvider(app), CONSUMPTION_PROJECTION),
+    ]
+    if json_provider.orjson is not None:
+        cases.append(('after: OrjsonProvider', json_provider.OrjsonProvider(app), CONSUMPTION_PROJECTION))
+    else:
+        print('orjson не установлен: вариант OrjsonProvider пропущен')
+
+    print(f'{args.rows} строк, лучшее из {args.repeat} запусков')
+    print(f'{"вариант":<42}{"время, мс":>12}{"байт":>14}')
+    for name, provider, projection in cases:
+        elapsed, size = measure(provider, projection, rows, args.repeat)
+        print(f'{name:<42}{elapsed:>12.1f}{size:>14}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/load_test.py
+"""Нагрузочный тест запущенного API: пропускная способность и задержки.
+
+Несколько потоков в течение заданного времени по кругу запрашивают
+указанные пути с заголовком X-User-ID (у каждого потока своё соединение
+keep-alive) и печатают число запросов в секунду и перцентили задержки.
+Для проверки масштабирования по ядрам запускайте его против gunicorn
+с разным GUNICORN_WORKERS (см. README), желательно с другой машины или
+на ядрах, не занятых сервером.
+
+Запуск из корня репозитория:
+    python benchmarks/load_test.py --url http://localhost:5000 --concurrency 32 --duration 30
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+DEFAULT_PATHS = ['/buildings', '/meters', '/consumption?limit=100', '/health']
+
+
+def worker(args, deadline, results, lock):
+    session = requests.Session()
+    session.headers['X-User-ID'] = str(args.user_id)
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < deadline:
+        path = args.paths[i % len(args.paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = session.get(args.url + path, timeout=args.timeout)
+            response.content
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+
+def run(args, duration):
+    """Нагрузить сервер на duration секунд; вернуть задержки успешных запросов и число ошибок."""
+    results = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(args, deadline, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results['latencies'], results['errors']
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--path', dest='paths', action='append',
+                        help='путь запроса (можно несколько раз); по умолчанию списки и /health')
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+    args.url = args.url.rstrip('/')
+    args.paths = args.paths or DEFAULT_PATHS
+
+    if args.warmup > 0:
+        run(args, args.warmup)
+    latencies, errors = run(args, args.duration)
+    latencies.sort()
+
+    print(f'{args.url}: {args.concurrency} потоков, {args.duration:g} с, пути: {", ".join(args.paths)}')
+    print(f'запросов: {len(latencies)}, ошибок: {errors}')
+    print(f'запросов в секунду: {len(latencies) / args.duration:.1f}')
+    print('задержка, мс: ' + ', '.join(
+        f'p{p} {percentile(latencies, p) * 1000:.1f}' for p in (50, 95, 99)
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# tests/conftest.py
+"""Общие фикстуры: изолированное приложение на SQLite в памяти с демо-данными."""
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from main import create_app
+from models import db
+from seed import seed_demo
+
+
+@pytest.fixture
+def make_app():
+    """Фабрика приложений: make_app(buildings=...) создаёт заполненный экземпляр."""
+    def factory(**seed_options):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+        with app.app_context():
+            seed_demo(**seed_options)
+        return app
+    return factory
+
+
+class StatementCounter:
+    """Счётчик SQL-запросов, отправленных движком приложения (с параметрами)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.parameters = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_statements():
+    """count_statements(app) — контекстный менеджер, считающий запросы к БД."""
+    def factory(app):
+        with app.app_context():
+            return StatementCounter(db.engine)
+    return factory
@@ -0,0 +1,26 @@
+# tests/test_access.py
+"""Проверка доступа к отдельным записям: EXISTS-запрос выполняется только для арендатора."""
+import pytest
+
+from models import db, Building, Meter
+
+
+@pytest.mark.parametrize('path', ['/meters/1', '/consumption/1'])
+def test_owner_check_runs_only_for_tenant(make_app, count_statements, path):
+    app = make_app(buildings=2, months=1)
+    with app.app_context():
+        owner_id = db.session.scalar(
+            db.select(Building.user_id).join(Meter, Meter.building_id == Building.id).where(Meter.id == 1))
+    client = app.test_client()
+
+    with count_statements(app) as admin:
+        assert client.get(path, headers={'X-User-ID': '1'}).status_code == 200
+    with count_statements(app) as tenant:
+        assert client.get(path, headers={'X-User-ID': str(owner_id)}).status_code == 200
+    with count_statements(app) as stranger:
+        other = 3 + (owner_id - 3 + 1) % 3  # арендаторы seed_demo — id 3..5
+        assert client.get(path, headers={'X-User-ID': str(other)}).status_code == 403
+
+    assert not any('EXISTS' in s for s in admin.statements)
+    assert any('EXISTS' in s for s in tenant.statements)
+    assert any('EXISTS' in s for s in stranger.statements)
@@ -0,0 +1,33 @@
+# tests/test_compression.py
+"""Сжатие ответов: у сжатого и несжатого представлений разные сильные ETag."""
+import pytest
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app(buildings=1, months=1, tenants=60).test_client()
+
+
+def get_users(client, encoding, etag=None):
+    headers = {'X-User-ID': '1', 'Accept-Encoding': encoding}
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get('/users', headers=headers)
+
+
+def test_compressed_representation_has_its_own_etag(client):
+    plain = get_users(client, 'identity')
+    packed = get_users(client, 'gzip')
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['ETag'] == '"users-1"'
+    assert packed.headers['ETag'] == '"users-1-gzip"'
+
+
+@pytest.mark.parametrize('encoding', ['identity', 'gzip'])
+def test_not_modified_repeats_stored_etag(client, encoding):
+    etag = get_users(client, encoding).headers['ETag']
+    response = get_users(client, encoding, etag)
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert 'Accept-Encoding' in response.headers['Vary']
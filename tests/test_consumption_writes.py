@@ -0,0 +1,45 @@
+# tests/test_consumption_writes.py
+"""Запись показаний: числовые строки принимаются, месячные итоги остаются согласованными."""
+import pytest
+
+from models import db, ConsumptionRecord, ConsumptionRollup
+
+HEADERS = {'X-User-ID': '1'}
+
+
+def rollup_total(app):
+    with app.app_context():
+        return (db.session.scalar(db.select(db.func.sum(ConsumptionRollup.total_kwh))),
+                db.session.scalar(db.select(db.func.sum(ConsumptionRecord.consumption_kwh))))
+
+
+def test_numeric_strings_are_accepted(make_app):
+    app = make_app(buildings=1, meters_per_building=1, months=2)
+    client = app.test_client()
+
+    response = client.put('/consumption/1', json={'consumption_kwh': '12'}, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.get_json()['consumption_kwh'] == 12.0
+
+    response = client.post('/consumption', json={
+        'meter_id': 1, 'period_start': '2024-03-01', 'period_end': '2024-03-31', 'consumption_kwh': '7.5'
+    }, headers=HEADERS)
+    assert response.status_code == 201
+
+    rollups, records = rollup_total(app)
+    assert rollups == pytest.approx(records)
+
+
+@pytest.mark.parametrize('value', ['abc', None, 'nan', 'inf', [1]])
+def test_invalid_kwh_is_rejected(make_app, value):
+    app = make_app(buildings=1, meters_per_building=1, months=1)
+    client = app.test_client()
+    before = rollup_total(app)
+
+    response = client.put('/consumption/1', json={'consumption_kwh': value}, headers=HEADERS)
+    assert response.status_code == 400
+    response = client.post('/consumption', json={
+        'meter_id': 1, 'period_start': '2024-03-01', 'period_end': '2024-03-31', 'consumption_kwh': value
+    }, headers=HEADERS)
+    assert response.status_code == 400
+    assert rollup_total(app) == before
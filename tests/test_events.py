@@ -0,0 +1,45 @@
+# tests/test_events.py
+"""Шина событий: слушатель Redis переживает разрыв соединения."""
+import threading
+import types
+
+import events
+
+
+class FakePubSub:
+    """Первая подписка обрывается после одного сообщения, следующие работают."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def subscribe(self, channel):
+        self.backend.subscriptions += 1
+
+    def listen(self):
+        self.backend.ready.wait()  # подписчик шины уже добавлен
+        yield {'data': '{"entity": "meter"}'}
+        if self.backend.subscriptions == 1:
+            raise ConnectionError('Redis недоступен')
+        yield {'data': '{"entity": "tariff"}'}
+        threading.Event().wait()
+
+    def close(self):
+        pass
+
+
+def test_redis_listener_reconnects_and_resets_subscribers(monkeypatch):
+    monkeypatch.setattr(events, 'redis', types.SimpleNamespace(RedisError=Exception))
+    backend = events.RedisBackend.__new__(events.RedisBackend)
+    backend.channel, backend.subscriptions, backend.ready = 'test', 0, threading.Event()
+    backend.client = types.SimpleNamespace(pubsub=lambda **kwargs: FakePubSub(backend))
+    backend.reconnect_delay = 0.01
+    backend._listener, backend._lock = None, threading.Lock()
+
+    bus = events.EventBus(backend)
+    subscription = bus.subscribe()
+    backend.ready.set()
+    received = [subscription.get(timeout=2) for _ in range(4)]
+
+    assert received == [{'entity': 'meter'}, events.RESET, {'entity': 'meter'}, {'entity': 'tariff'}]
+    assert backend.subscriptions == 2
+    assert backend._listener.is_alive()
@@ -0,0 +1,26 @@
+# tests/test_list_queries.py
+"""Списки выбираются фиксированным числом запросов, независимо от числа строк (без N+1)."""
+import pytest
+
+LIST_PATHS = ['/buildings', '/meters', '/consumption?limit=5000']
+
+
+def statements_for(app, count_statements, path):
+    client = app.test_client()
+    with count_statements(app) as counter:
+        response = client.get(path, headers={'X-User-ID': '1'})
+    assert response.status_code == 200
+    return counter.count, response.get_json()
+
+
+@pytest.mark.parametrize('path', LIST_PATHS)
+def test_statement_count_does_not_grow_with_rows(make_app, count_statements, path):
+    small = make_app(buildings=5, meters_per_building=2, months=3)
+    large = make_app(buildings=50, meters_per_building=2, months=3)
+
+    small_count, small_body = statements_for(small, count_statements, path)
+    large_count, large_body = statements_for(large, count_statements, path)
+
+    rows = lambda body: body['items'] if isinstance(body, dict) else body
+    assert len(rows(large_body)) == 10 * len(rows(small_body))
+    assert large_count == small_count
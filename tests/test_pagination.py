@@ -0,0 +1,42 @@
+# tests/test_pagination.py
+"""Keyset-пагинация /consumption: курсоры и их проверка."""
+import base64
+import json
+
+import pytest
+
+
+def make_cursor(*parts):
+    raw = json.dumps(list(parts)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def test_pages_follow_cursor(make_app):
+    client = make_app(buildings=2, meters_per_building=2, months=3).test_client()
+    headers = {'X-User-ID': '1'}
+    ids, cursor = [], None
+    while True:
+        response = client.get('/consumption', query_string={'limit': 5, **({'cursor': cursor} if cursor else {})},
+                              headers=headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        ids += [item['id'] for item in body['items']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+    assert ids == list(range(1, 2 * 2 * 3 + 1))
+
+
+@pytest.mark.parametrize('cursor', [
+    make_cursor('id', 'abc', 1),
+    make_cursor('id', 1.5, 1),
+    make_cursor('id', True, 1),
+    make_cursor('id', 1, '1'),
+    make_cursor('period_start', '2024-01-01', 1),
+    'не base64',
+])
+def test_malformed_cursor_is_rejected(make_app, cursor):
+    client = make_app(buildings=1, months=1).test_client()
+    response = client.get('/consumption', query_string={'cursor': cursor}, headers={'X-User-ID': '1'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Некорректный cursor'}
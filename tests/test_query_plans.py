@@ -0,0 +1,41 @@
+# tests/test_query_plans.py
+"""Запросы арендатора и /stats используют индексы (EXPLAIN QUERY PLAN в SQLite)."""
+from models import db, User
+
+TENANT_INDEXES = ('ix_buildings_user_id', 'ix_meters_building_id', 'ix_consumption_records_meter_period')
+
+
+def query_plans(app, count_statements, path, user_id):
+    """Планы всех SELECT, которые выполнил эндпоинт, одной строкой на запрос."""
+    with count_statements(app) as counter:
+        response = app.test_client().get(path, headers={'X-User-ID': str(user_id)})
+    assert response.status_code == 200
+    plans = []
+    with app.app_context():
+        connection = db.session.connection()
+        for statement, parameters in zip(counter.statements, counter.parameters):
+            if statement.lstrip().upper().startswith('SELECT'):
+                rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+                plans.append('\n'.join(row[-1] for row in rows))
+    return plans
+
+
+def tenant_id(app):
+    with app.app_context():
+        return db.session.scalar(db.select(User.id).where(User.login == 'tenant1'))
+
+
+def test_tenant_consumption_list_uses_owner_indexes(make_app, count_statements):
+    app = make_app(buildings=30, meters_per_building=2, months=6)
+    plans = query_plans(app, count_statements, '/consumption', tenant_id(app))
+    plan = next(p for p in plans if 'consumption_records' in p)
+    for index in TENANT_INDEXES:
+        assert index in plan, plan
+
+
+def test_tenant_stats_aggregate_uses_owner_indexes(make_app, count_statements):
+    app = make_app(buildings=30, meters_per_building=2, months=6)
+    plans = query_plans(app, count_statements, '/stats', tenant_id(app))
+    plan = next(p for p in plans if 'consumption_records' in p)
+    for index in TENANT_INDEXES:
+        assert index in plan, plan
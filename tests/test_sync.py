@@ -0,0 +1,91 @@
+# tests/test_sync.py
+"""Дельта-синхронизация: журнал удалений, смена владельца здания и правка тарифа."""
+from datetime import timedelta
+
+from models import db, utcnow, Tariff, Building, Meter, ConsumptionRecord, Tombstone
+
+
+def changes(client, user_id, collection, token):
+    response = client.get(f'/{collection}/changes', query_string={'since': token},
+                          headers={'X-User-ID': str(user_id)})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def sync_token(client, user_id, collection):
+    return changes(client, user_id, collection, '')['token']
+
+
+def test_owner_change_moves_building_rows_between_tenants(make_app):
+    app = make_app(buildings=3, meters_per_building=2, months=2)
+    with app.app_context():
+        building = db.session.get(Building, 1)
+        old_owner = building.user_id
+        new_owner = 3 + (old_owner - 3 + 1) % 3  # арендаторы seed_demo — id 3..5
+        meter_ids = sorted(db.session.scalars(db.select(Meter.id).where(Meter.building_id == 1)))
+        record_ids = sorted(db.session.scalars(
+            db.select(ConsumptionRecord.id).where(ConsumptionRecord.meter_id.in_(meter_ids))))
+    assert old_owner != new_owner
+    client = app.test_client()
+    collections = ['buildings', 'meters', 'consumption']
+    tokens = {(user, c): sync_token(client, user, c) for user in (old_owner, new_owner, 1) for c in collections}
+
+    response = client.put('/buildings/1', json={'user_id': new_owner}, headers={'X-User-ID': '1'})
+    assert response.status_code == 200
+
+    # Токен берётся с запасом SYNC_OVERLAP, поэтому в items попадают и только что созданные строки
+    expected = {'buildings': [1], 'meters': meter_ids, 'consumption': record_ids}
+    for collection, ids in expected.items():
+        old = changes(client, old_owner, collection, tokens[old_owner, collection])
+        assert sorted(old['deleted']) == ids
+        assert not set(ids) & {item['id'] for item in old['items']}
+
+        new = changes(client, new_owner, collection, tokens[new_owner, collection])
+        assert set(ids) <= {item['id'] for item in new['items']}
+        assert new['deleted'] == []
+
+        admin = changes(client, 1, collection, tokens[1, collection])
+        assert set(ids) <= {item['id'] for item in admin['items']}
+        assert admin['deleted'] == []
+
+
+def test_cascade_delete_resolves_owner_once_per_meter(make_app, count_statements):
+    app = make_app(buildings=3, meters_per_building=2, months=6)
+    client = app.test_client()
+    with count_statements(app) as counter:
+        response = client.delete('/buildings/1', headers={'X-User-ID': '1'})
+    assert response.status_code == 204
+    owner_lookups = [s for s in counter.statements
+                     if s.startswith(('SELECT buildings.user_id', 'SELECT meters.building_id, buildings.user_id'))]
+    assert len(owner_lookups) == 2  # по одному на счётчик
+
+    with app.app_context():
+        owners = db.session.execute(db.select(Tombstone.entity, Tombstone.owner_id)).all()
+        building_owner = {owner for entity, owner in owners if entity == 'building'}
+    assert len(owners) == 1 + 2 + 2 * 6
+    assert {owner for _, owner in owners} == building_owner
+
+
+def test_tariff_validity_change_reports_affected_readings(make_app):
+    app = make_app(buildings=3, meters_per_building=1, months=2)
+    with app.app_context():
+        # Демо-данные «старые»: в изменения попадает только то, что задела правка тарифа
+        for model in (Tariff, Building, Meter, ConsumptionRecord):
+            db.session.execute(db.update(model).values(updated_at=utcnow() - timedelta(hours=1)))
+        db.session.commit()
+        affected = sorted(db.session.scalars(
+            db.select(ConsumptionRecord.id)
+            .join(Meter, Meter.id == ConsumptionRecord.meter_id)
+            .join(Building, Building.id == Meter.building_id)
+            .where(Building.tariff_id == 1)))
+    client = app.test_client()
+    token = sync_token(client, 1, 'consumption')
+
+    response = client.put('/tariffs/1', json={'valid_to': '2024-01-15'}, headers={'X-User-ID': '1'})
+    assert response.status_code == 200
+
+    items = changes(client, 1, 'consumption', token)['items']
+    assert affected and sorted(item['id'] for item in items) == affected
+    # Февральские показания вышли из срока тарифа и остались без стоимости
+    assert [item['estimated_cost_rub'] for item in items if item['period_start'] >= '2024-02-01'] == \
+        [None] * (len(affected) // 2)
@@ -0,0 +1,36 @@
+# tests/test_tariffs.py
+"""Стоимость везде считается по тарифу, действующему в периоде показания."""
+from datetime import date
+
+import pytest
+
+from models import db, Tariff
+
+HEADERS = {'X-User-ID': '1'}
+
+
+@pytest.fixture
+def client(make_app):
+    # Первый тариф перестаёт действовать после первого месяца демо-данных
+    app = make_app(buildings=3, meters_per_building=1, months=3)
+    with app.app_context():
+        db.session.get(Tariff, 1).valid_to = date(2024, 1, 31)
+        db.session.commit()
+    return app.test_client()
+
+
+def test_cost_matches_across_endpoints(client):
+    records = client.get('/consumption', query_string={'limit': 5000}, headers=HEADERS).get_json()['items']
+    uncosted = [r for r in records if r['estimated_cost_rub'] is None]
+    assert uncosted and all(r['period_start'] > '2024-01-31' for r in uncosted)
+
+    stats = client.get('/stats', headers=HEADERS).get_json()
+    report = client.get('/reports/consumption-by-building', headers=HEADERS).get_json()
+    list_cost = sum(r['estimated_cost_rub'] or 0 for r in records)
+    assert stats['total_cost'] == pytest.approx(list_cost, abs=0.05)
+    assert report['total_cost_rub'] == pytest.approx(list_cost, abs=0.05)
+    assert stats['uncosted_consumption'] == pytest.approx(sum(r['consumption_kwh'] for r in uncosted))
+    assert report['total_kwh'] == pytest.approx(stats['total_consumption'])
+
+    single = client.get(f"/consumption/{uncosted[0]['id']}", headers=HEADERS).get_json()
+    assert single['estimated_cost_rub'] is None
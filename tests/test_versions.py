@@ -0,0 +1,41 @@
+# tests/test_versions.py
+"""init-db, migrate и seed_demo: счётчики версий справочников для ETag и месячные итоги."""
+from main import create_app
+from models import db, ConsumptionRollup, TableVersion, VERSIONED_TABLES
+
+
+def versions(app):
+    with app.app_context():
+        return dict(db.session.execute(db.select(TableVersion.table_name, TableVersion.version)).all())
+
+
+def test_init_db_and_migrate_create_version_rows():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['init-db']).exit_code == 0
+    assert versions(app) == {name: 0 for name in VERSIONED_TABLES}
+
+    with app.app_context():
+        db.session.execute(db.delete(TableVersion).where(TableVersion.table_name == 'tariffs'))
+        db.session.commit()
+    result = runner.invoke(args=['migrate'])
+    assert 'tariffs' in result.output
+    assert versions(app) == {name: 0 for name in VERSIONED_TABLES}
+
+
+def test_seed_demo_changes_reference_etags(make_app):
+    app = make_app(buildings=1, months=1)
+    assert versions(app) == {name: 1 for name in VERSIONED_TABLES}
+    response = app.test_client().get('/regions', headers={'X-User-ID': '1'})
+    assert response.headers['ETag'] == '"regions-1"'
+
+
+def test_migrate_fills_new_rollups_table(make_app):
+    app = make_app(buildings=2, meters_per_building=1, months=3)
+    with app.app_context():
+        ConsumptionRollup.__table__.drop(db.engine)
+    result = app.test_cli_runner().invoke(args=['migrate'])
+    assert 'consumption_rollups' in result.output
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(ConsumptionRollup)) == 2 * 3
+    assert 'consumption_rollups' not in app.test_cli_runner().invoke(args=['migrate']).output